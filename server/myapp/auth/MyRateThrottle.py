@@ -1,4 +1,4 @@
-from rest_framework.throttling import AnonRateThrottle
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
 class MyRateThrottle(AnonRateThrottle):
@@ -6,3 +6,51 @@ class MyRateThrottle(AnonRateThrottle):
     THROTTLE_RATES = {"anon": "2/min"}
 
 
+class CounterRateThrottleMixin:
+    """
+    固定窗口限流, 计数通过cache.incr原子递增
+    默认的SimpleRateThrottle读取-修改-写入请求历史列表, 多个worker并发时会丢失计数
+    """
+
+    # 服务端内部请求(如缓存预热)在WSGI environ中设置该键, 不计入限流;
+    # 请求头在environ中都带HTTP_前缀, 客户端无法伪造
+    INTERNAL_ENVIRON_KEY = 'myapp.internal'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        if request.META.get(self.INTERNAL_ENVIRON_KEY):
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+
+        key = f"{self.key}_{window}"
+        self.cache.add(key, 0, self.duration)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # 窗口计数恰好过期
+            self.cache.set(key, 1, self.duration)
+            count = 1
+
+        if count > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        return max(self.window_end - self.now, 0)
+
+
+class AnonCounterRateThrottle(CounterRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserCounterRateThrottle(CounterRateThrottleMixin, UserRateThrottle):
+    pass
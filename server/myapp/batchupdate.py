@@ -0,0 +1,55 @@
+"""
+后台列表的批量修改
+ids为逗号分隔的id(或数组), patch为要修改的字段; 字段按只含可批量修改字段的序列化器部分校验后,
+用一条 UPDATE ... WHERE id IN (...) 写入, 由视图的after_call统一使缓存失效
+"""
+from rest_framework import serializers
+
+from myapp.handler import APIResponse
+
+MAX_IDS = 1000  # 单次批量修改的最大记录数
+
+
+def patch_serializer(model, fields):
+    """只含可批量修改字段的模型序列化器, 在视图模块中生成一次"""
+    meta = type('Meta', (), {'model': model, 'fields': tuple(fields)})
+    return type(f"{model.__name__}PatchSerializer", (serializers.ModelSerializer,), {'Meta': meta})
+
+
+def parse_ids(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        return []
+    ids = []
+    for item in value:
+        try:
+            ids.append(int(str(item).strip()))
+        except ValueError:
+            continue
+    return ids
+
+
+def parse_patch(request, serializer_class, fields):
+    """
+    校验批量修改的参数
+    返回 (ids, 要写入的字段值, None), 参数错误时返回 (None, None, APIResponse)
+    """
+    ids = parse_ids(request.data.get('ids'))
+    if not ids:
+        return None, None, APIResponse(code=1, msg='缺少ids')
+    if len(ids) > MAX_IDS:
+        return None, None, APIResponse(code=1, msg=f'一次最多修改{MAX_IDS}条')
+
+    patch = request.data.get('patch')
+    if not isinstance(patch, dict) or not patch:
+        return None, None, APIResponse(code=1, msg='缺少patch')
+    unsupported = sorted(set(patch) - set(fields))
+    if unsupported:
+        return None, None, APIResponse(code=1, msg=f"不支持批量修改的字段: {', '.join(unsupported)}")
+
+    serializer = serializer_class(data=patch, partial=True)
+    if not serializer.is_valid():
+        return None, None, APIResponse(code=1, msg='参数错误', data=serializer.errors)
+    values = {field: serializer.validated_data[field] for field in patch if field in serializer.validated_data}
+    return ids, values, None
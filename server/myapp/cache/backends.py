@@ -0,0 +1,322 @@
+"""
+本机多进程共享缓存后端
+数据保存在本机SQLite文件中(WAL模式), 同一主机上的所有worker进程共享同一份缓存,
+验证码、2FA临时token、限流计数、页面缓存在任一进程写入后对其他进程立即可见,
+无需部署redis/memcached等外部服务
+
+CACHES = {
+    'default': {
+        'BACKEND': 'myapp.cache.backends.SQLiteSharedCache',
+        'LOCATION': '/path/to/cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,       # 条目上限, 超出后按写入顺序淘汰
+            'CULL_FREQUENCY': 4,        # 超出上限时淘汰 1/4
+            'L1_TIMEOUT': 1,            # 进程内L1缓存秒数, 0为关闭
+            'L1_PREFIXES': ['section_view:'],  # 只有这些前缀的键进入L1
+        },
+    }
+}
+"""
+import itertools
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+logger = logging.getLogger('myapp')
+
+
+class SQLiteSharedCache(BaseCache):
+    """
+    SQLite共享缓存
+
+    - 整数直接以INTEGER存储, incr/decr为单条UPDATE, 多进程下原子
+    - 其他值pickle后以BLOB存储
+    - expires为过期时间戳, NULL表示永不过期
+    - 条目超过MAX_ENTRIES后删除过期条目, 仍超出则按写入顺序淘汰最早的一部分
+    - 可选L1: 指定前缀的键在进程内缓存L1_TIMEOUT秒, 用于页面缓存等允许秒级延迟的数据,
+      验证码/2FA/限流、缓存标签版本号等需要立即跨进程可见的键不应配置进L1
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    # 每写入多少次检查一次条目数量
+    CULL_CHECK_INTERVAL = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._l1_timeout = options.get('L1_TIMEOUT', 0)
+        self._l1_prefixes = tuple(options.get('L1_PREFIXES', ()))
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1 = OrderedDict()  # key -> (l1过期时间, value)
+        self._l1_lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = itertools.count(1)  # 多线程下计数, next()不需要加锁
+
+    # ---------- 连接 ----------
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # fork出的子进程不能复用父进程的连接
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entry ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    # ---------- 序列化 ----------
+
+    def _encode(self, value):
+        # bool是int的子类, 需要按普通对象处理
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    # ---------- L1 ----------
+
+    def _l1_enabled(self, key):
+        return self._l1_timeout and key.startswith(self._l1_prefixes)
+
+    def _l1_get(self, key):
+        item = self._l1.get(key)
+        if item is None:
+            return False, None
+        if item[0] < time.time():
+            with self._l1_lock:
+                self._l1.pop(key, None)
+            return False, None
+        return True, item[1]
+
+    def _l1_set(self, key, value):
+        with self._l1_lock:
+            self._l1[key] = (time.time() + self._l1_timeout, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, key):
+        if self._l1:
+            with self._l1_lock:
+                self._l1.pop(key, None)
+
+    # ---------- 缓存接口 ----------
+
+    def get(self, key, default=None, version=None):
+        raw_key = key
+        key = self.make_and_validate_key(key, version=version)
+        use_l1 = self._l1_enabled(raw_key)
+        if use_l1:
+            found, value = self._l1_get(key)
+            if found:
+                return value
+
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache_entry WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+
+        value = self._decode(row[0])
+        if use_l1:
+            self._l1_set(key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        result = {}
+        pending = {}
+        for raw_key in keys:
+            key = self.make_and_validate_key(raw_key, version=version)
+            if self._l1_enabled(raw_key):
+                found, value = self._l1_get(key)
+                if found:
+                    result[raw_key] = value
+                    continue
+            pending[key] = raw_key
+        if not pending:
+            return result
+
+        placeholders = ','.join('?' * len(pending))
+        rows = self._connection().execute(
+            f'SELECT key, value, expires FROM cache_entry WHERE key IN ({placeholders})',
+            list(pending),
+        ).fetchall()
+        now = time.time()
+        for key, value, expires in rows:
+            if expires is not None and expires <= now:
+                continue
+            raw_key = pending[key]
+            value = self._decode(value)
+            result[raw_key] = value
+            if self._l1_enabled(raw_key):
+                self._l1_set(key, value)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        raw_key = key
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        if self._l1_enabled(raw_key):
+            self._l1_set(key, value)
+        self._maybe_cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = []
+        for raw_key, value in data.items():
+            key = self.make_and_validate_key(raw_key, version=version)
+            rows.append((key, self._encode(value), expires))
+            if self._l1_enabled(raw_key):
+                self._l1_set(key, value)
+        conn = self._connection()
+        with self._transaction(conn):
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows
+            )
+        self._maybe_cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """键不存在或已过期时写入, 多进程下原子"""
+        raw_key = key
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        with self._transaction(conn):
+            row = conn.execute('SELECT expires FROM cache_entry WHERE key = ?', (key,)).fetchone()
+            if row is not None and (row[0] is None or row[0] > time.time()):
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+                (key, self._encode(value), self.get_backend_timeout(timeout)),
+            )
+        if self._l1_enabled(raw_key):
+            self._l1_set(key, value)
+        self._maybe_cull()
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        """原子递增, 键不存在或不是整数时抛出ValueError"""
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        with self._transaction(conn):
+            cursor = conn.execute(
+                "UPDATE cache_entry SET value = value + ? WHERE key = ? "
+                "AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?)",
+                (delta, key, time.time()),
+            )
+            if cursor.rowcount == 0:
+                raise ValueError("Key '%s' not found" % key)
+            value = conn.execute('SELECT value FROM cache_entry WHERE key = ?', (key,)).fetchone()[0]
+        self._l1_delete(key)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1_delete(key)
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        for key in keys:
+            self._l1_delete(key)
+        conn = self._connection()
+        with self._transaction(conn):
+            conn.executemany('DELETE FROM cache_entry WHERE key = ?', [(key,) for key in keys])
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        with self._l1_lock:
+            self._l1.clear()
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # 每个线程保持一个长连接, 请求结束时不关闭
+        pass
+
+    # ---------- 内部 ----------
+
+    class _transaction:
+        """BEGIN IMMEDIATE事务, 事务内的读写对其他进程原子"""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.execute('BEGIN IMMEDIATE')
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+            return False
+
+    def _maybe_cull(self):
+        if next(self._writes) % self.CULL_CHECK_INTERVAL:
+            return
+        try:
+            self._cull()
+        except sqlite3.Error as e:
+            logger.warning(f"缓存淘汰失败: {str(e)}")
+
+    def _cull(self):
+        conn = self._connection()
+        count = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count <= self._max_entries:
+            return
+
+        conn.execute('DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count <= self._max_entries:
+            return
+
+        # rowid随每次写入递增, 淘汰最早写入的条目
+        cull_num = count // self._cull_frequency if self._cull_frequency else count
+        conn.execute(
+            'DELETE FROM cache_entry WHERE rowid IN (SELECT rowid FROM cache_entry ORDER BY rowid LIMIT ?)',
+            (cull_num,),
+        )
+        logger.info(f"缓存条目超出上限, 已淘汰{cull_num}条")
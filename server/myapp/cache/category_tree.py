@@ -0,0 +1,96 @@
+"""
+分类树的进程内缓存
+一次查询取出全部分类, 在内存中组装父子关系; 分类写入后递增版本号, 各进程在下一个请求时重新加载
+子树id查询和整棵树序列化都不再逐层查库
+"""
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.db.models.signals import post_delete
+
+from myapp.cache import versions
+
+# 版本号名称 (b_cache_version.name)
+VERSION_NAME = 'category_tree'
+
+FIELDS = ('id', 'pid', 'title', 'sort', 'cover')
+
+_lock = threading.Lock()
+_snapshot = None  # (version, CategoryTree)
+
+
+class CategoryTree:
+    """
+    分类树
+    nodes: {id: 分类字段}
+    children: {pid: [子分类id]}, 按 sort, -id 排序
+    """
+
+    def __init__(self, rows):
+        self.nodes = {}
+        self.children = defaultdict(list)
+        for row in rows:
+            self.nodes[row['id']] = row
+            self.children[row['pid']].append(row['id'])
+
+    def subtree_ids(self, category_id):
+        """
+        分类自身及所有子孙分类的id
+        pid可能有环(自己是自己的父分类或互为父分类), 已访问的分类跳过
+        """
+        ids = [category_id]
+        seen = {category_id}
+        stack = [category_id]
+        while stack:
+            for sub_id in self.children.get(stack.pop(), []):
+                if sub_id not in seen:
+                    seen.add(sub_id)
+                    ids.append(sub_id)
+                    stack.append(sub_id)
+        return ids
+
+    def serialize(self, pid=-1, _seen=None):
+        """
+        pid下的子分类, 格式同CategorySerializer(带children); pid有环时已出现的分类不再展开
+        """
+        seen = {pid} if _seen is None else _seen
+        result = []
+        for category_id in self.children.get(pid, []):
+            if category_id in seen:
+                continue
+            seen.add(category_id)
+            item = dict(self.nodes[category_id])
+            item['children'] = self.serialize(category_id, seen)
+            result.append(item)
+        return result
+
+
+def get_tree():
+    """返回当前版本的分类树"""
+    global _snapshot
+    version = versions.current(VERSION_NAME)
+    snapshot = _snapshot
+    if snapshot is None or snapshot[0] != version:
+        model = apps.get_model('myapp', 'Category')
+        rows = list(model.objects.order_by('sort', '-id').values(*FIELDS))
+        snapshot = (version, CategoryTree(rows))
+        with _lock:
+            _snapshot = snapshot
+    return snapshot[1]
+
+
+def bump_version():
+    """分类写入后递增版本号, 使所有进程的分类树失效"""
+    global _snapshot
+    versions.bump(VERSION_NAME)
+    with _lock:
+        _snapshot = None
+
+
+def _on_category_deleted(**kwargs):
+    bump_version()
+
+
+# 覆盖queryset批量删除, 批量删除不会调用Model.delete()
+post_delete.connect(_on_category_deleted, sender='myapp.Category', dispatch_uid='category_tree_deleted')
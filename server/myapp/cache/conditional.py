@@ -0,0 +1,76 @@
+"""
+HTTP条件请求
+前台接口的内容由缓存键和依赖标签的版本号决定, 以此生成强ETag和Last-Modified;
+客户端携带If-None-Match/If-Modified-Since且内容未变化时直接返回304, 不查库也不序列化
+gzip响应和原始响应是不同的表示, ETag加-gz后缀区分; 验证时两种ETag都视为同一内容
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+from myapp.cache.tags import TaggedCache
+
+GZIP_SUFFIX = '-gz'
+
+
+def make_etag(key, versions):
+    raw = '|'.join([key] + [f"{tag}:{versions[tag]}" for tag in sorted(versions)])
+    return f'"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+
+
+def gzip_etag(etag):
+    """gzip表示的ETag, "<tag>" 变为 "<tag>-gz" """
+    return f'{etag[:-1]}{GZIP_SUFFIX}"'
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    同get_conditional_response, If-None-Match中的gzip或原始ETag都视为匹配
+    返回 (304/412响应或None, 匹配的ETag)
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        compressed = gzip_etag(etag)
+        if any(tag.removeprefix('W/') == compressed for tag in parse_etags(if_none_match)):
+            etag = compressed
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response, etag
+
+
+def last_modified(versions):
+    # 标签版本号是最近一次失效的毫秒时间戳
+    if not versions:
+        return None
+    return max(versions.values()) // 1000
+
+
+def set_validators(response, key, versions, gzip=False):
+    """
+    写入ETag/Last-Modified
+    versions为生成响应内容时的标签版本号, gzip为响应是否压缩
+    """
+    etag = make_etag(key, versions)
+    response['ETag'] = gzip_etag(etag) if gzip else etag
+    modified = last_modified(versions)
+    if modified:
+        response['Last-Modified'] = http_date(modified)
+    # 允许客户端缓存, 但每次使用前需要验证
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def not_modified(request, key, tags, versions=None):
+    """
+    客户端缓存仍有效时返回304响应, 否则返回None
+    versions: 已获取的标签版本号, 为None时读取tags的当前版本号
+    """
+    if versions is None:
+        versions = TaggedCache.tag_versions(tags)
+    etag = make_etag(key, versions)
+    response, matched = conditional_response(request, etag, last_modified(versions))
+    if response is not None:
+        set_validators(response, key, versions, gzip=matched != etag)
+    return response
@@ -0,0 +1,63 @@
+"""
+列表总数缓存
+按查询条件(SQL及参数)缓存count()结果, 依赖标签失效后重新统计
+表很大时可开启估算模式: 不带过滤条件的总数直接读取数据库的表统计信息, 不扫描整表
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import connections
+
+from myapp.cache.tags import TaggedCache
+
+logger = logging.getLogger('myapp')
+
+KEY_PREFIX = 'list_count:'
+DEFAULT_TIMEOUT = 3600
+
+
+def make_key(queryset):
+    """查询条件签名, 忽略排序"""
+    query = queryset.order_by().query
+    sql, params = query.sql_with_params()
+    digest = hashlib.md5(f"{sql}|{params!r}".encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}{queryset.model._meta.db_table}:{digest}"
+
+
+def estimated_count(queryset):
+    """
+    从表统计信息读取估算行数, 不支持的数据库返回None
+    只适用于不带过滤条件的查询
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def cached_count(queryset, tags, timeout=DEFAULT_TIMEOUT):
+    """
+    返回查询集的总数
+    tags: 查询依赖的模型标签, 写入这些模型后缓存失效
+    settings.COUNT_ESTIMATE_THRESHOLD: 不带过滤条件且估算行数不小于该值时返回估算值, 为None时不估算
+    """
+    def build():
+        threshold = getattr(settings, 'COUNT_ESTIMATE_THRESHOLD', None)
+        if threshold is not None and not queryset.query.where:
+            try:
+                estimate = estimated_count(queryset)
+            except Exception as e:
+                logger.warning(f"读取估算行数失败: {e}")
+                estimate = None
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return queryset.count()
+
+    return TaggedCache.get_or_set(make_key(queryset), build, timeout, tags)
@@ -0,0 +1,86 @@
+"""
+浏览量计数缓冲
+详情接口只在进程内累加计数, 定时(及进程退出时)合并写入数据库:
+同一模型中增量相同的记录用一条 UPDATE ... SET pv = pv + n WHERE id IN (...) 写入,
+读请求不再对记录加行锁; 多个进程各自累加各自写入, 增量相加不会互相覆盖
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+logger = logging.getLogger('myapp')
+
+DEFAULT_FLUSH_INTERVAL = 30  # 写入数据库的间隔秒数
+
+_lock = threading.Lock()
+_counts = defaultdict(Counter)  # model label -> {pk: 增量}
+_timer = None
+
+
+def hit(model, pk):
+    """记录一次浏览, pk不是整数时忽略"""
+    global _timer
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return
+
+    with _lock:
+        _counts[model._meta.label][pk] += 1
+        if _timer is None:
+            _timer = threading.Timer(getattr(settings, 'PV_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL), _run_scheduled)
+            _timer.daemon = True
+            _timer.start()
+
+
+def flush():
+    """
+    把缓冲的浏览量写入数据库, 返回写入的记录数
+    写入失败时计数放回缓冲区, 下次重试
+    """
+    with _lock:
+        counts = dict(_counts)
+        _counts.clear()
+
+    written = 0
+    for label, counter in counts.items():
+        model = apps.get_model(label)
+        # 增量 -> [pk]
+        groups = defaultdict(list)
+        for pk, n in counter.items():
+            groups[n].append(pk)
+        remaining = dict(groups)
+        try:
+            for n, pks in groups.items():
+                model.objects.filter(pk__in=pks).update(pv=F('pv') + n)
+                written += len(pks)
+                del remaining[n]
+        except Exception as e:
+            logger.error(f"浏览量写入失败: {label} {str(e)}")
+            # 只放回未写入的组, 已写入的不会重复计数
+            with _lock:
+                for n, pks in remaining.items():
+                    for pk in pks:
+                        _counts[label][pk] += n
+    return written
+
+
+def _run_scheduled():
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        written = flush()
+        if written:
+            logger.info(f"浏览量已写入: {written}条记录")
+    finally:
+        connections.close_all()
+
+
+atexit.register(flush)
@@ -0,0 +1,302 @@
+"""
+前台页面数据缓存
+条目过期或依赖标签失效后继续返回旧数据, 由一个请求在后台重建(stale-while-revalidate);
+同一个键在同一主机上同时只有一个重建任务(single-flight), 避免缓存击穿时所有请求一起查库
+
+缓存键只由页面实际读取的参数组成, utm_source、随机数等无关参数不会产生新条目;
+每个页面按预算划分固定数量的槽位, 条目数不会超过预算
+
+条目中保存编码好的响应字节(以及gzip版本), 命中时直接返回, 每次失效只做一次JSON编码和压缩
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from myapp import timing
+from myapp.cache import conditional
+from myapp.cache.tags import TaggedCache
+
+logger = logging.getLogger('myapp')
+
+
+class SectionCache:
+    """
+    页面数据缓存
+
+    条目结构: {'key': 规范化键, 'body': 响应字节, 'gzip': 压缩后的响应字节或None,
+              'tags': 依赖标签版本号, 'fresh_until': 新鲜截止时间}
+    - 新鲜: 直接返回 (hit)
+    - 过期或标签失效: 返回旧数据, 后台重建 (stale)
+    - 不存在: 抢到重建锁的请求同步生成, 其他请求等待其结果 (miss)
+
+    条目存放在 section_view:<页面>:<槽位> 下, 槽位由规范化键哈希到 [0, 预算) 得到,
+    槽位被其他键占用时视为未命中并覆盖, 多进程同时写入也不会超出预算
+    """
+
+    KEY_PREFIX = 'section_view:'
+    LOCK_PREFIX = 'section_lock:'
+    STATS_PREFIX = 'section_stats:'
+
+    STALE_TIMEOUT = 86400  # 过期后旧数据保留的秒数
+    LOCK_TIMEOUT = 30  # 重建锁超时秒数, 防止重建线程异常退出后锁不释放
+    WAIT_TIMEOUT = 5  # 未抢到锁时等待其他请求生成结果的秒数
+    WAIT_INTERVAL = 0.05
+    STATS_FLUSH_INTERVAL = 5  # 进程内计数同步到共享缓存的间隔秒数
+
+    # 各页面的条目预算(槽位数), 可通过settings.SECTION_CACHE_BUDGETS覆盖
+    BUDGETS = {
+        'home': 1,
+        'about': 1,
+        'contact': 1,
+        'faq': 20,
+        'download': 20,
+        'thing': 300,
+        'thing_detail': 1000,
+        'news': 50,
+        'news_detail': 500,
+        'case': 50,
+        'case_detail': 300,
+    }
+    DEFAULT_BUDGET = 100
+    MAX_KEY_QUERY_LENGTH = 100  # 参数部分超过该长度时取哈希
+    GZIP_MIN_LENGTH = 1024  # 响应字节数不小于该值时保存gzip版本
+    CONTENT_TYPE = 'application/json; charset=utf-8'
+
+    _gzip_re = re.compile(r'\bgzip\b')
+
+    # 使用本缓存的页面
+    NAMES = tuple(BUDGETS)
+
+    _local = threading.local()
+    _stats = {}
+    _stats_lock = threading.Lock()
+    _stats_flushed_at = time.time()
+
+    @classmethod
+    def make_key(cls, name, request, params=None):
+        """
+        规范化缓存键
+        params: {参数名: 默认值}, 只保留页面实际读取的参数, 按名称排序,
+        等于默认值或为空的参数省略, 其余参数全部忽略
+        """
+        pairs = []
+        for param in sorted(params or {}):
+            value = request.GET.get(param)
+            if value is None or value == '' or value == params[param]:
+                continue
+            pairs.append((param, value))
+
+        query = urlencode(pairs)
+        if len(query) > cls.MAX_KEY_QUERY_LENGTH:
+            query = hashlib.md5(query.encode('utf-8')).hexdigest()
+        return f"{name}?{query}"
+
+    @classmethod
+    def budget(cls, name):
+        budgets = getattr(settings, 'SECTION_CACHE_BUDGETS', {})
+        return budgets.get(name, cls.BUDGETS.get(name, cls.DEFAULT_BUDGET))
+
+    @classmethod
+    def _slot_key(cls, name, key):
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        slot = int(digest[:8], 16) % max(cls.budget(name), 1)
+        return f"{cls.KEY_PREFIX}{name}:{slot}"
+
+    @classmethod
+    def _read(cls, slot_key, key):
+        entry = cache.get(slot_key)
+        if isinstance(entry, dict) and entry.get('key') == key and 'body' in entry:
+            return entry
+        return None
+
+    @classmethod
+    def get_entry(cls, name, key, builder, tags, timeout=3600):
+        """
+        读取缓存条目
+        name: 页面名称, 用于统计和预算
+        key: make_key()生成的规范化键
+        builder: 无参函数, 返回页面数据; 旧数据刷新时在后台线程中调用, 其中的timing.phase()不记录
+        tags: 依赖的模型标签
+        timeout: 新鲜时间(秒)
+        返回的条目中tags为生成数据时的标签版本号
+        """
+        slot_key = cls._slot_key(name, key)
+        entry = cls._read(slot_key, key)
+        if entry is not None:
+            current = TaggedCache.tag_versions(entry['tags'].keys(), create=False)
+            if entry['fresh_until'] > time.time() and current == entry['tags']:
+                cls._count(name, 'hit')
+                return entry
+
+            cls._count(name, 'stale')
+            if getattr(cls._local, 'sync_refresh', False):
+                return cls._build_or_wait(slot_key, key, builder, tags, timeout)
+            cls._refresh_async(name, slot_key, key, builder, tags, timeout)
+            return entry
+
+        cls._count(name, 'miss')
+        return cls._build_or_wait(slot_key, key, builder, tags, timeout)
+
+    @classmethod
+    def respond(cls, request, name, key, builder, tags, timeout=3600):
+        """
+        返回页面接口响应, 参数同get_entry
+        客户端缓存仍有效时直接返回304, 不读取缓存也不生成数据;
+        返回旧数据时ETag对应旧版本号, 客户端下次请求会拿到新数据
+        """
+        response = conditional.not_modified(request, key, tags)
+        if response is not None:
+            return response
+
+        with timing.phase(request, 'cache'):
+            entry = cls.get_entry(name, key, builder, tags, timeout)
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        gzip = entry['gzip'] is not None and bool(cls._gzip_re.search(accept_encoding))
+        if gzip:
+            response = HttpResponse(entry['gzip'], content_type=cls.CONTENT_TYPE)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(entry['body'], content_type=cls.CONTENT_TYPE)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return conditional.set_validators(response, key, entry['tags'], gzip=gzip)
+
+    @classmethod
+    def encode(cls, value):
+        """
+        按APIResponse的格式编码页面数据
+        返回 (响应字节, gzip字节或None)
+        """
+        body = JSONRenderer().render({'code': 0, 'msg': '查询成功', 'total': 0, 'data': value})
+        compressed = None
+        if len(body) >= cls.GZIP_MIN_LENGTH:
+            compressed = compress_string(body)
+            if len(compressed) >= len(body):
+                compressed = None
+        return body, compressed
+
+    @classmethod
+    @contextmanager
+    def sync_refresh(cls):
+        """
+        当前线程内过期条目同步重建而不是返回旧数据, 用于缓存预热
+        """
+        cls._local.sync_refresh = True
+        try:
+            yield
+        finally:
+            cls._local.sync_refresh = False
+
+    @classmethod
+    def _lock_key(cls, key):
+        return f"{cls.LOCK_PREFIX}{key}"
+
+    @classmethod
+    def _build(cls, slot_key, key, builder, tags, timeout):
+        # 先取标签版本号, 生成期间发生的失效不会被掩盖
+        versions = TaggedCache.tag_versions(tags)
+        body, compressed = cls.encode(builder())
+        entry = {
+            'key': key,
+            'body': body,
+            'gzip': compressed,
+            'tags': versions,
+            'fresh_until': time.time() + timeout,
+        }
+        cache.set(slot_key, entry, timeout + cls.STALE_TIMEOUT)
+        return entry
+
+    @classmethod
+    def _build_or_wait(cls, slot_key, key, builder, tags, timeout):
+        lock_key = cls._lock_key(key)
+        if cache.add(lock_key, 1, cls.LOCK_TIMEOUT):
+            try:
+                return cls._build(slot_key, key, builder, tags, timeout)
+            finally:
+                cache.delete(lock_key)
+
+        # 其他请求正在生成, 等待其结果
+        deadline = time.time() + cls.WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(cls.WAIT_INTERVAL)
+            entry = cls._read(slot_key, key)
+            if entry is not None:
+                return entry
+
+        logger.warning(f"等待页面缓存生成超时, 直接生成: {key}")
+        return cls._build(slot_key, key, builder, tags, timeout)
+
+    @classmethod
+    def _refresh_async(cls, name, slot_key, key, builder, tags, timeout):
+        lock_key = cls._lock_key(key)
+        if not cache.add(lock_key, 1, cls.LOCK_TIMEOUT):
+            # 已有请求在重建
+            return
+
+        def refresh():
+            started = time.time()
+            try:
+                cls._build(slot_key, key, builder, tags, timeout)
+                logger.info(f"页面缓存后台重建完成: {key} ({round((time.time() - started) * 1000)}ms)")
+            except Exception as e:
+                # 对象已删除等情况, 丢弃旧数据, 下个请求同步生成并返回真实结果
+                cache.delete(slot_key)
+                logger.error(f"页面缓存后台重建失败: {key} {str(e)}")
+            finally:
+                cache.delete(lock_key)
+                connections.close_all()
+
+        threading.Thread(target=refresh, name=f"section-refresh-{name}", daemon=True).start()
+
+    # ---------- 统计 ----------
+
+    @classmethod
+    def _count(cls, name, kind):
+        with cls._stats_lock:
+            cls._stats[(name, kind)] = cls._stats.get((name, kind), 0) + 1
+            if time.time() - cls._stats_flushed_at < cls.STATS_FLUSH_INTERVAL:
+                return
+            pending, cls._stats = cls._stats, {}
+            cls._stats_flushed_at = time.time()
+        cls._flush_stats(pending)
+
+    @classmethod
+    def _flush_stats(cls, pending):
+        for (name, kind), count in pending.items():
+            stats_key = f"{cls.STATS_PREFIX}{name}:{kind}"
+            try:
+                cache.add(stats_key, 0, None)
+                cache.incr(stats_key, count)
+            except ValueError:
+                cache.set(stats_key, count, None)
+
+    @classmethod
+    def stats(cls, names=None):
+        """
+        各页面的命中统计(所有进程汇总)
+        返回 {name: {'hit': n, 'stale': n, 'miss': n}}
+        """
+        names = names or cls.NAMES
+        with cls._stats_lock:
+            pending, cls._stats = cls._stats, {}
+            cls._stats_flushed_at = time.time()
+        cls._flush_stats(pending)
+
+        kinds = ('hit', 'stale', 'miss')
+        keys = [f"{cls.STATS_PREFIX}{name}:{kind}" for name in names for kind in kinds]
+        values = cache.get_many(keys)
+        return {
+            name: {kind: values.get(f"{cls.STATS_PREFIX}{name}:{kind}", 0) for kind in kinds}
+            for name in names
+        }
@@ -0,0 +1,51 @@
+"""
+站点配置单例的进程内快照
+BasicSite/BasicTdk/BasicBanner 等单行配置读多写少, 按数据库中的版本号缓存在进程内,
+每个请求只查询一次版本号, 任一进程保存配置后版本号递增, 其他进程在下一个请求时重新加载
+"""
+import copy
+import threading
+
+from django.core.exceptions import ObjectDoesNotExist
+
+from myapp.cache import versions
+
+# 版本号名称 (b_cache_version.name)
+VERSION_NAME = 'site_config'
+
+_lock = threading.Lock()
+_snapshots = {}  # model label -> (version, instance)
+
+
+def current_version():
+    """获取当前配置版本号, 请求内只查询一次"""
+    return versions.current(VERSION_NAME)
+
+
+def bump_version():
+    """配置写入后递增版本号, 使所有进程的快照失效"""
+    versions.bump(VERSION_NAME)
+    with _lock:
+        _snapshots.clear()
+
+
+def get_solo(model):
+    """
+    按版本号返回单例配置的副本, 不存在时返回None
+    返回副本, 调用方修改实例不会污染快照
+    """
+    version = current_version()
+    label = model._meta.label
+
+    snapshot = _snapshots.get(label)
+    if snapshot is None or snapshot[0] != version:
+        try:
+            instance = model.objects.get()
+        except ObjectDoesNotExist:
+            instance = None
+        snapshot = (version, instance)
+        with _lock:
+            _snapshots[label] = snapshot
+
+    instance = snapshot[1]
+    return copy.copy(instance) if instance is not None else None
@@ -0,0 +1,109 @@
+"""
+按依赖标签失效的缓存
+每个缓存条目声明其依赖的模型标签, 后台写入时只使相关标签失效,
+不会影响验证码、2FA、登录锁定、限流计数等安全数据
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger('myapp')
+
+# 依赖标签
+TAG_THING = 'thing'
+TAG_CATEGORY = 'category'
+TAG_NEWS = 'news'
+TAG_CASE = 'case'
+TAG_FAQ = 'faq'
+TAG_DOWNLOAD = 'download'
+TAG_COMMENT = 'comment'
+TAG_ADVANTAGE = 'advantage'
+TAG_INQUIRY = 'inquiry'
+TAG_SITE_CONFIG = 'site_config'  # BasicSite/BasicTdk/BasicBanner/BasicGlobal/BasicAdditional/About
+
+ALL_TAGS = (
+    TAG_THING, TAG_CATEGORY, TAG_NEWS, TAG_CASE, TAG_FAQ, TAG_DOWNLOAD,
+    TAG_COMMENT, TAG_ADVANTAGE, TAG_INQUIRY, TAG_SITE_CONFIG,
+)
+
+
+class TaggedCache:
+    """
+    标签缓存
+
+    每个标签对应一个版本号(毫秒时间戳), 条目写入时记录所依赖标签的版本号,
+    读取时版本号不一致即视为失效; 失效只需更新标签版本号, 不需要遍历或清空缓存
+    """
+
+    TAG_KEY_PREFIX = 'cache_tag:'
+
+    @classmethod
+    def tag_key(cls, tag):
+        return f"{cls.TAG_KEY_PREFIX}{tag}"
+
+    @classmethod
+    def tag_versions(cls, tags, create=True):
+        """
+        获取标签当前版本号
+        create为True时, 不存在(首次使用或被淘汰)的标签会初始化一个新版本号
+        """
+        tags = list(tags)
+        found = cache.get_many([cls.tag_key(tag) for tag in tags])
+        versions = {tag: found[cls.tag_key(tag)] for tag in tags if cls.tag_key(tag) in found}
+
+        missing = [tag for tag in tags if tag not in versions]
+        if missing and create:
+            now = int(time.time() * 1000)
+            for tag in missing:
+                # add不会覆盖其他请求同时写入的版本号
+                cache.add(cls.tag_key(tag), now, None)
+            found = cache.get_many([cls.tag_key(tag) for tag in missing])
+            for tag in missing:
+                versions[tag] = found.get(cls.tag_key(tag), now)
+        return versions
+
+    @classmethod
+    def get(cls, key, default=None):
+        """读取条目, 依赖标签已失效时返回default"""
+        entry = cache.get(key)
+        if not isinstance(entry, dict) or 'tags' not in entry:
+            return default
+
+        current = cls.tag_versions(entry['tags'].keys(), create=False)
+        if current != entry['tags']:
+            return default
+        return entry['value']
+
+    @classmethod
+    def set(cls, key, value, timeout, tags, versions=None):
+        """
+        写入条目
+        versions应在计算value之前获取, 避免计算期间发生的失效被新版本号掩盖
+        """
+        if versions is None:
+            versions = cls.tag_versions(tags)
+        cache.set(key, {'tags': versions, 'value': value}, timeout)
+
+    @classmethod
+    def get_or_set(cls, key, builder, timeout, tags):
+        """读取条目, 不存在或已失效时调用builder()生成并写入"""
+        value = cls.get(key)
+        if value is not None:
+            return value
+
+        versions = cls.tag_versions(tags)
+        value = builder()
+        cls.set(key, value, timeout, tags, versions=versions)
+        return value
+
+    @classmethod
+    def invalidate(cls, *tags):
+        """使标签失效, 依赖这些标签的条目在下次读取时重新生成"""
+        if not tags:
+            return
+        now = int(time.time() * 1000)
+        old = cls.tag_versions(tags, create=False)
+        # 同一毫秒内多次失效时保证版本号递增
+        cache.set_many({cls.tag_key(tag): max(now, old.get(tag, 0) + 1) for tag in tags}, None)
+        logger.info(f"缓存标签失效: {', '.join(tags)}")
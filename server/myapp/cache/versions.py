@@ -0,0 +1,70 @@
+"""
+进程内缓存的版本号
+数据保存在b_cache_version表中, 每个名称一行; 进程内缓存记录其加载时的版本号,
+任一进程写入数据后递增版本号, 其他进程发现版本号变化后重新加载
+每个请求内同一名称只查询一次版本号
+"""
+import threading
+
+from django.apps import apps
+from django.core.signals import request_started, request_finished
+from django.db import IntegrityError
+from django.db.models import F
+
+_local = threading.local()
+
+
+def _on_request_started(**kwargs):
+    _local.in_request = True
+    _local.versions = {}
+
+
+def _on_request_finished(**kwargs):
+    _local.in_request = False
+    _local.versions = {}
+
+
+request_started.connect(_on_request_started, dispatch_uid='cache_versions_request_started')
+request_finished.connect(_on_request_finished, dispatch_uid='cache_versions_request_finished')
+
+
+def _version_model():
+    return apps.get_model('myapp', 'CacheVersion')
+
+
+def load(name):
+    """从数据库读取版本号"""
+    version = _version_model().objects.filter(name=name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def current(name):
+    """
+    获取版本号
+    请求内只查询一次, 请求外(后台线程/命令)每次都查询
+    """
+    if not getattr(_local, 'in_request', False):
+        return load(name)
+
+    versions = getattr(_local, 'versions', None)
+    if versions is None:
+        versions = _local.versions = {}
+    if name not in versions:
+        versions[name] = load(name)
+    return versions[name]
+
+
+def bump(name):
+    """数据写入后递增版本号, 使所有进程的缓存失效"""
+    model = _version_model()
+    updated = model.objects.filter(name=name).update(version=F('version') + 1)
+    if not updated:
+        try:
+            model.objects.create(name=name, version=1)
+        except IntegrityError:
+            # 并发创建, 再递增一次
+            model.objects.filter(name=name).update(version=F('version') + 1)
+
+    versions = getattr(_local, 'versions', None)
+    if versions:
+        versions.pop(name, None)
@@ -0,0 +1,148 @@
+"""
+缓存预热
+部署后或后台写入使缓存失效后, 主动生成前台页面缓存, 避免第一个访客承担生成耗时
+
+- manage.py warm_cache: 预热全部前台接口
+- settings.CACHE_WARM_AFTER_INVALIDATE为True时, 后台写入失效标签后
+  延迟CACHE_WARM_DELAY秒(合并连续写入)预热依赖这些标签的接口
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve
+
+from myapp.auth.MyRateThrottle import CounterRateThrottleMixin
+from myapp.cache.section import SectionCache
+
+logger = logging.getLogger('myapp')
+
+DEFAULT_PAGES = 3
+DEFAULT_WORKERS = 4
+DEFAULT_DELAY = 2
+
+_pending_tags = set()
+_pending_lock = threading.Lock()
+_timer = None
+
+
+def get_targets(pages=DEFAULT_PAGES):
+    """
+    需要预热的前台接口
+    返回 [{'name': 名称, 'path': 路径, 'params': 查询参数, 'tags': 依赖标签}]
+    """
+    import myapp.views.index.about as about
+    import myapp.views.index.case as case
+    import myapp.views.index.common as common
+    import myapp.views.index.contact as contact
+    import myapp.views.index.download as download
+    import myapp.views.index.faq as faq
+    import myapp.views.index.home as home
+    import myapp.views.index.news as news
+    import myapp.views.index.sitemap as sitemap
+    import myapp.views.index.thing as thing
+    from myapp.models import Category
+
+    targets = []
+    for name, module in (
+            ('home', home), ('about', about), ('contact', contact), ('faq', faq), ('download', download),
+            ('case', case), ('news', news), ('common', common), ('sitemap', sitemap)):
+        targets.append({
+            'name': name,
+            'path': f"/myapp/index/{name}/section",
+            'params': {},
+            'tags': module.CACHE_TAGS,
+        })
+
+    # 全部产品及各分类的前N页
+    category_ids = [None] + list(Category.objects.order_by('sort', '-id').values_list('id', flat=True))
+    for category_id in category_ids:
+        for page in range(1, pages + 1):
+            params = {}
+            if category_id is not None:
+                params['categoryId'] = category_id
+            if page > 1:
+                params['page'] = page
+            query = '&'.join(f"{k}={v}" for k, v in params.items())
+            targets.append({
+                'name': f"thing?{query}" if query else 'thing',
+                'path': '/myapp/index/thing/section',
+                'params': params,
+                'tags': thing.CACHE_TAGS,
+            })
+    return targets
+
+
+def warm_one(target):
+    """
+    请求一个接口, 返回 (名称, 状态码或异常信息, 耗时毫秒)
+    过期条目同步重建, 不走后台刷新
+    """
+    request = RequestFactory().get(target['path'], target['params'], **{
+        CounterRateThrottleMixin.INTERNAL_ENVIRON_KEY: True,
+    })
+    started = time.time()
+    try:
+        with SectionCache.sync_refresh():
+            response = resolve(target['path']).func(request)
+        status = response.status_code
+    except Exception as e:
+        status = f"error: {str(e)}"
+    finally:
+        connections.close_all()
+    return target['name'], status, round((time.time() - started) * 1000)
+
+
+def warm(targets, workers=DEFAULT_WORKERS):
+    """
+    在线程池中预热, 返回各接口结果, 顺序与targets一致
+    """
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cache-warm') as executor:
+        return list(executor.map(warm_one, targets))
+
+
+def schedule(tags):
+    """
+    标签失效后预热依赖这些标签的接口
+    未开启CACHE_WARM_AFTER_INVALIDATE时不做任何事
+    """
+    global _timer
+    if not getattr(settings, 'CACHE_WARM_AFTER_INVALIDATE', False):
+        return
+
+    with _pending_lock:
+        _pending_tags.update(tags)
+        if _timer is not None:
+            # 已有预热任务等待执行, 合并
+            return
+        _timer = threading.Timer(getattr(settings, 'CACHE_WARM_DELAY', DEFAULT_DELAY), _run_scheduled)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _run_scheduled():
+    global _timer
+    with _pending_lock:
+        tags = set(_pending_tags)
+        _pending_tags.clear()
+        _timer = None
+
+    try:
+        pages = getattr(settings, 'CACHE_WARM_PAGES', DEFAULT_PAGES)
+        targets = [target for target in get_targets(pages) if tags.intersection(target['tags'])]
+        started = time.time()
+        results = warm(targets, getattr(settings, 'CACHE_WARM_WORKERS', DEFAULT_WORKERS))
+        # 超出页数的分页返回404, 不算失败
+        failed = [name for name, status, _ in results if status not in (200, 404)]
+        logger.info(f"缓存预热完成: {len(results)}个接口, 失败{len(failed)}个, "
+                    f"耗时{round((time.time() - started) * 1000)}ms")
+    except Exception as e:
+        logger.error(f"缓存预热失败: {str(e)}")
+    finally:
+        connections.close_all()
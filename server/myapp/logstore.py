@@ -0,0 +1,316 @@
+"""
+日志表按月分区与保留期
+b_op_log / b_error_log / b_security_event 在MySQL上按时间列 RANGE COLUMNS 分区, 主键为(id, 时间列):
+分区时已超出保留期的旧数据都放在一个p_old分区中, 保留期内每月一个分区, pmax接收超出已建分区的数据;
+过期月份整分区删除, 不逐行删除
+其他数据库(SQLite)不分区, 过期数据按主键分批删除
+
+rotate_logs命令由定时任务执行: 预建后续月份的分区, 删除超出保留期的月份, 删除前可归档为
+<归档目录>/<表名>-<YYYYMM>.ndjson.gz
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Min
+from django.utils import timezone
+
+logger = logging.getLogger('myapp')
+
+# 日志模型 -> 分区时间列
+LOG_MODELS = {
+    'myapp.OpLog': 're_time',
+    'myapp.ErrorLog': 'log_time',
+    'myapp.SecurityEvent': 'create_time',
+}
+
+# 保留月数(含当月), 可通过settings.LOG_RETENTION_MONTHS覆盖
+DEFAULT_RETENTION_MONTHS = {
+    'myapp.OpLog': 6,
+    'myapp.ErrorLog': 12,
+    'myapp.SecurityEvent': 24,
+}
+
+PARTITIONS_AHEAD = 2  # 预建的后续月份数
+MAX_PARTITION = 'pmax'
+OLD_PARTITION = 'p_old'
+BATCH_SIZE = 5000
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def get_models():
+    return [apps.get_model(label) for label in LOG_MODELS]
+
+
+def retention_months(model):
+    months = getattr(settings, 'LOG_RETENTION_MONTHS', {})
+    label = model._meta.label
+    return months.get(label, DEFAULT_RETENTION_MONTHS.get(label))
+
+
+def _time_field(model):
+    return LOG_MODELS[model._meta.label]
+
+
+def _connection(model):
+    return connections[model.objects.db]
+
+
+def partitions(model):
+    """MySQL上已建分区的名称, 未分区或其他数据库返回空列表"""
+    connection = _connection(model)
+    if connection.vendor != 'mysql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [model._meta.db_table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _old_partition_bound(model):
+    """p_old分区的上界, 没有该分区时返回None"""
+    connection = _connection(model)
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME = %s",
+            [model._meta.db_table, OLD_PARTITION],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return datetime.strptime(row[0].strip("'"), '%Y-%m-%d %H:%M:%S')
+
+
+def _less_than(value):
+    return f"VALUES LESS THAN ('{value:%Y-%m-%d %H:%M:%S}')"
+
+
+def _partition_defs(months, old_bound=None):
+    defs = []
+    if old_bound is not None:
+        defs.append(f"PARTITION {OLD_PARTITION} {_less_than(old_bound)}")
+    defs.extend(f"PARTITION {partition_name(month)} {_less_than(add_months(month, 1))}" for month in months)
+    defs.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return ', '.join(defs)
+
+
+def retention_cutoff(model, months=None):
+    """保留期的起点(月初), 早于它的数据过期; 不限保留期时返回None"""
+    months = months or retention_months(model)
+    if not months:
+        return None
+    return add_months(month_start(timezone.now()), 1 - months)
+
+
+def partition(model, months_ahead=PARTITIONS_AHEAD):
+    """
+    把日志表改为按月分区, 只在MySQL上执行, 已分区时跳过
+    分区键必须包含在主键中, 主键改为(id, 时间列)
+    """
+    connection = _connection(model)
+    if connection.vendor != 'mysql' or partitions(model):
+        return False
+
+    # 保留期之前的数据(包括迁移中补齐时间的旧记录)只放一个p_old分区, 不按月展开
+    # 按月分区从保留期起点开始
+    field = _time_field(model)
+    now_month = month_start(timezone.now())
+    month = retention_cutoff(model) or now_month
+    old_bound = month if model.objects.filter(**{f'{field}__lt': month}).exists() else None
+    last = add_months(now_month, months_ahead)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    column = qn(model._meta.get_field(field).column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({qn('id')}, {column})")
+        cursor.execute(f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS({column}) "
+                       f"({_partition_defs(months, old_bound)})")
+    return True
+
+
+def unpartition(model):
+    """取消分区, 恢复主键为id"""
+    connection = _connection(model)
+    if connection.vendor != 'mysql' or not partitions(model):
+        return False
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({qn('id')})")
+    return True
+
+
+def ensure_partitions(model, months_ahead=PARTITIONS_AHEAD):
+    """从pmax中拆出当月及后续月份的分区, 返回新建的分区名"""
+    existing = partitions(model)
+    if MAX_PARTITION not in existing:
+        return []
+
+    month = month_start(timezone.now())
+    missing = []
+    for _ in range(months_ahead + 1):
+        if partition_name(month) not in existing:
+            missing.append(month)
+        month = add_months(month, 1)
+    if not missing:
+        return []
+
+    connection = _connection(model)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {MAX_PARTITION} INTO ({_partition_defs(missing)})")
+    return [partition_name(month) for month in missing]
+
+
+def _month_queryset(model, month):
+    field = _time_field(model)
+    return model.objects.filter(**{f'{field}__gte': month, f'{field}__lt': add_months(month, 1)})
+
+
+def archive(model, month, archive_dir):
+    """
+    把一个月的数据写入 <表名>-<YYYYMM>.ndjson.gz, 返回 (文件路径, 行数)
+    先写临时文件, 完成后改名, 中途失败不会留下不完整的归档
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{model._meta.db_table}-{month:%Y%m}.ndjson.gz")
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for row in _month_queryset(model, month).order_by('pk').values().iterator(chunk_size=BATCH_SIZE):
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+            rows += 1
+    os.replace(tmp_path, path)
+    return path, rows
+
+
+def _delete_batches(queryset):
+    """按主键分批删除, 避免一条大DELETE长时间锁表"""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def drop_month(model, month):
+    """删除一个月的数据: 有对应分区时整分区删除, 否则分批删除"""
+    name = partition_name(month)
+    if name in partitions(model):
+        connection = _connection(model)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+        return
+    _delete_batches(_month_queryset(model, month))
+
+
+def expire(model, months=None, archive_dir=None):
+    """
+    删除超出保留期的月份, 返回删除的月份列表 [(月份, 归档文件或None)]
+    months: 保留月数(含当月), 默认取retention_months()
+    """
+    cutoff = retention_cutoff(model, months)
+    if cutoff is None:
+        return []
+
+    # 只取有数据的月份, 跳过中间的空月份
+    field = _time_field(model)
+    expired = set()
+    older = model.objects.filter(**{f'{field}__lt': cutoff})
+    first = older.aggregate(first=Min(field))['first']
+    while first is not None:
+        month = month_start(first)
+        expired.add(month)
+        first = older.filter(**{f'{field}__gte': add_months(month, 1)}).aggregate(first=Min(field))['first']
+    # 没有数据的旧分区也一并删除
+    existing = partitions(model)
+    for name in existing:
+        if name not in (MAX_PARTITION, OLD_PARTITION):
+            month = datetime.strptime(name[1:], '%Y%m')
+            if month < cutoff:
+                expired.add(month)
+
+    # p_old整个在保留期之前时, 归档后整分区删除
+    old_bound = _old_partition_bound(model) if OLD_PARTITION in existing else None
+    drop_old = old_bound is not None and old_bound <= cutoff
+
+    result = []
+    for month in sorted(expired):
+        path = None
+        if archive_dir:
+            path, rows = archive(model, month, archive_dir)
+            if not rows:
+                os.remove(path)
+                path = None
+        if not (drop_old and month < old_bound and partition_name(month) not in existing):
+            drop_month(model, month)
+        result.append((month, path))
+
+    if drop_old:
+        connection = _connection(model)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {OLD_PARTITION}")
+    return result
+
+
+def clear(model):
+    """清空日志表: MySQL用TRUNCATE(保留分区定义), 其他数据库分批删除"""
+    connection = _connection(model)
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {connection.ops.quote_name(model._meta.db_table)}")
+        return
+    _delete_batches(model.objects.all())
+
+
+def rotate(archive_dir=None):
+    """
+    对全部日志表执行预建分区和过期删除
+    返回 {表名: {'created': [分区名], 'expired': [(月份, 归档文件)]}}, 失败的表为 {'error': 错误}
+    """
+    result = {}
+    for model in get_models():
+        table = model._meta.db_table
+        try:
+            result[table] = {
+                'created': ensure_partitions(model),
+                'expired': expire(model, archive_dir=archive_dir),
+            }
+        except Exception as e:
+            # 一张表失败不影响其他表
+            logger.error(f"日志表轮转失败: {table} {str(e)}")
+            result[table] = {'error': str(e)}
+    return result
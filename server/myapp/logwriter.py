@@ -0,0 +1,204 @@
+"""
+日志异步批量写入
+请求线程只把记录放入有界队列, 后台线程每满batch_size条或每隔interval毫秒用bulk_create写入一次;
+队列满时丢弃新记录并计数(背压), 不阻塞请求; 进程退出时写完队列中剩余的记录
+计数在进程内累加, 每批写入后合并到共享缓存, stats()返回所有进程的汇总
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from myapp.stats import counters, visits
+
+logger = logging.getLogger('myapp')
+
+BACKPRESSURE_LOG_INTERVAL = 60  # 队列满的警告最多每隔多少秒记录一次
+RETRY_SPLIT = 4  # 整批写入失败时拆成几份重试一次
+
+STATS_PREFIX = 'log_writer_stats:'
+# accepted: 放入队列, written: 已写入, dropped: 丢失(队列满+写入失败), failed: 其中写入失败的条数
+STATS_KINDS = ('accepted', 'written', 'dropped', 'failed')
+
+
+class BufferedLogWriter:
+    """
+    model_label: 写入的模型, 如 'myapp.OpLog'
+    max_size: 队列上限
+    batch_size: 每批写入的最大条数
+    interval: 最长攒批毫秒数
+    on_write: 每批写入成功后以该批记录调用, 用于增量汇总
+    """
+
+    def __init__(self, model_label, max_size=10000, batch_size=200, interval=1000, on_write=None):
+        self.model_label = model_label
+        self.on_write = on_write
+        self.batch_size = batch_size
+        self.interval = interval / 1000
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_backpressure_log = 0
+        self._pending = Counter()  # 未合并到共享缓存的计数
+
+        atexit.register(self.flush)
+
+    def put(self, record):
+        """
+        放入一条记录 (字段dict), 队列已满时丢弃并返回False
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._pending['dropped'] += 1
+                now = time.time()
+                report = now - self._last_backpressure_log >= BACKPRESSURE_LOG_INTERVAL
+                if report:
+                    self._last_backpressure_log = now
+            if report:
+                logger.warning(f"日志写入队列已满: {self.model_label}, 新记录被丢弃")
+            return False
+        with self._lock:
+            self._pending['accepted'] += 1
+        return True
+
+    def stats(self):
+        """所有进程的汇总计数, queued为尚未写入的条数(估算); max_size为每个进程的队列上限"""
+        self._flush_stats()
+        keys = {kind: self._stats_key(kind) for kind in STATS_KINDS}
+        values = cache.get_many(keys.values())
+        data = {kind: values.get(key, 0) for kind, key in keys.items()}
+        data['queued'] = max(data['accepted'] - data['written'] - data['failed'], 0)
+        data['max_size'] = self._queue.maxsize
+        return data
+
+    def flush(self):
+        """同步写入队列中的全部记录"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+        self._flush_stats()
+        connections.close_all()
+
+    def _stats_key(self, kind):
+        return f"{STATS_PREFIX}{self.model_label}:{kind}"
+
+    def _count(self, kind, n):
+        with self._lock:
+            self._pending[kind] += n
+
+    def _flush_stats(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        try:
+            for kind, count in pending.items():
+                key = self._stats_key(kind)
+                try:
+                    cache.add(key, 0, None)
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count, None)
+        except Exception as e:
+            logger.warning(f"日志写入计数同步失败: {self.model_label} {str(e)}")
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"log-writer-{self.model_label}", daemon=True)
+            self._thread.start()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # 等到第一条记录后开始攒批
+            batch = [self._queue.get()]
+            deadline = time.time() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _insert(self, batch):
+        model = apps.get_model(self.model_label)
+        try:
+            model.objects.bulk_create([model(**record) for record in batch])
+            return True
+        except Exception as e:
+            logger.error(f"日志批量写入失败: {self.model_label} {len(batch)}条, {str(e)}")
+            # 连接可能已失效, 下一次重新连接
+            connections.close_all()
+            return False
+
+    def _write(self, batch):
+        if self._insert(batch):
+            written = batch
+        else:
+            # 拆小重试一次, 只丢弃仍然失败的部分, 丢弃的条数计入dropped
+            written = []
+            size = max(1, -(-len(batch) // RETRY_SPLIT))
+            for start in range(0, len(batch), size):
+                chunk = batch[start:start + size]
+                if self._insert(chunk):
+                    written.extend(chunk)
+                else:
+                    self._count('failed', len(chunk))
+                    self._count('dropped', len(chunk))
+
+        if written:
+            self._count('written', len(written))
+            if self.on_write is not None:
+                try:
+                    self.on_write(written)
+                except Exception as e:
+                    logger.error(f"日志写入后处理失败: {self.model_label} {str(e)}")
+        self._flush_stats()
+
+
+def truncate(value, model_label, field):
+    """按字段max_length截断, 代替序列化器校验"""
+    if value is None:
+        return None
+    max_length = apps.get_model(model_label)._meta.get_field(field).max_length
+    value = str(value)
+    return value[:max_length] if max_length else value
+
+
+def _after_oplog_write(records):
+    visits.record(records)
+    counters.refresh_visits()
+
+
+oplog_writer = BufferedLogWriter(
+    'myapp.OpLog',
+    max_size=getattr(settings, 'OPLOG_BUFFER_SIZE', 10000),
+    batch_size=getattr(settings, 'OPLOG_BATCH_SIZE', 200),
+    interval=getattr(settings, 'OPLOG_FLUSH_INTERVAL_MS', 1000),
+    on_write=_after_oplog_write,
+)
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.search import related
+
+
+class Command(BaseCommand):
+    help = '重算全部上架产品的词项和相关产品'
+
+    def handle(self, *args, **options):
+        started = time.time()
+        things, records = related.rebuild()
+        elapsed = round((time.time() - started) * 1000)
+        self.stdout.write(self.style.SUCCESS(f"完成: {things}个产品, {records}条相关记录, 耗时{elapsed}ms"))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import sitemaps
+
+
+class Command(BaseCommand):
+    help = '生成sitemap, 默认只重写内容变化的子sitemap'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='重写全部文件')
+
+    def handle(self, *args, **options):
+        if not cache.add(sitemaps.LOCK_KEY, 1, sitemaps.LOCK_TIMEOUT):
+            raise CommandError('其他进程正在生成sitemap')
+
+        started = time.time()
+        try:
+            manifest, written = sitemaps.generate(full=options['full'])
+        finally:
+            cache.delete(sitemaps.LOCK_KEY)
+
+        for name, entry in sorted(manifest['files'].items()):
+            self.stdout.write(f"  {name:<40} {entry['count']:>6} {entry['lastmod']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"完成: {len(manifest['files'])}个文件, 重写{written}个, 耗时{round((time.time() - started) * 1000)}ms"))
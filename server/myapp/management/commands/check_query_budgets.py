@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_started, request_finished
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from myapp.auth.MyRateThrottle import CounterRateThrottleMixin
+from myapp.cache.section import SectionCache
+from myapp.models import User
+
+# 不使用缓存, 每个请求都走生成数据的路径
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def budgeted_views(patterns=None, prefix='/'):
+    """
+    声明了查询预算的接口 [(路径, 视图)]
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    views = []
+    for pattern in patterns:
+        route = str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            views.extend(budgeted_views(pattern.url_patterns, prefix + route))
+        elif isinstance(pattern, URLPattern) and hasattr(pattern.callback, 'query_budget'):
+            views.append((prefix + route, pattern.callback))
+    return views
+
+
+class Command(BaseCommand):
+    help = '请求声明了查询预算的接口, 查询次数超出预算时返回失败'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100,
+                            help='列表接口的pageSize, 越大越容易暴露N+1查询')
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(role='1').order_by('id').first()
+        factory = APIRequestFactory()
+
+        failed = []
+        with override_settings(CACHES=NO_CACHE):
+            for path, view in budgeted_views():
+                sample = view.query_budget_sample
+                params = dict(sample()) if sample else {}
+                params.setdefault('pageSize', options['page_size'])
+                if params.get('id') is None and 'id' in params:
+                    self.stdout.write(self.style.WARNING(f"  {path:<32} 没有样例数据, 跳过"))
+                    continue
+
+                request = factory.get(path, params, **{CounterRateThrottleMixin.INTERNAL_ENVIRON_KEY: True})
+                if path.startswith('/myapp/admin/'):
+                    if admin is None:
+                        self.stdout.write(self.style.WARNING(f"  {path:<32} 没有管理员账号, 跳过"))
+                        continue
+                    force_authenticate(request, user=admin)
+
+                # 模拟完整请求, 使请求内只查询一次的缓存版本号按真实情况计数
+                request_started.send(sender=self.__class__)
+                try:
+                    with CaptureQueriesContext(connection) as queries, SectionCache.sync_refresh():
+                        response = view(request)
+                finally:
+                    request_finished.send(sender=self.__class__)
+
+                line = f"  {path:<32} {len(queries):>3}/{view.query_budget}  HTTP {response.status_code}"
+                if len(queries) > view.query_budget:
+                    failed.append(path)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+
+        if failed:
+            raise CommandError(f"{len(failed)}个接口超出查询预算: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("全部接口在查询预算内"))
@@ -0,0 +1,111 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from myapp import pagination
+from myapp.models import Thing, Category, Inquiry, OpLog, SecurityEvent, SearchPosting
+from myapp.views.index import thing, news, case, faq, download
+
+
+# SQLite执行计划中使用的索引
+SQLITE_INDEX_RE = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def hot_queries():
+    """
+    需要走索引的热点查询 (名称, 查询集, 应使用的索引名或可接受的索引名元组)
+    列表查询取自视图使用的section_queryset(), 游标分页取首页和翻页后的查询
+    """
+    since = timezone.now() - timedelta(days=7)
+    # 翻页游标: 取当前时间之前的记录
+    cursor = (timezone.now(), 2 ** 62, pagination.NEXT)
+    page = 10
+    # 分类筛选: 第一个顶级分类及其子分类
+    top = Category.objects.filter(pid=-1).order_by('sort', '-id').values_list('id', flat=True).first()
+
+    queries = [
+        ('thing.list', thing.section_queryset()[:9], 'thing_status_ctime_id'),
+        ('thing.category', thing.section_queryset(thing.get_all_category_ids(top if top is not None else -1))[:9],
+         # 多个分类id时优化器可能改为按(status, create_time)索引顺序扫描, 再过滤分类
+         ('thing_cat_ctime_id', 'thing_status_ctime_id')),
+        ('thing.featured', Thing.flagged(Thing.FLAG_FEATURED, 8), 'thing_featured'),
+        ('thing.recommended', Thing.flagged(Thing.FLAG_RECOMMENDED, 4), 'thing_recommended'),
+        ('thing.most_viewed', Thing.most_viewed(8), 'thing_status_pv_id'),
+        ('news.list', news.section_queryset()[:9], 'news_ctime_id'),
+        ('case.list', case.section_queryset()[:9], 'case_ctime_id'),
+        ('inquiry.list', Inquiry.objects.order_by('-create_time')[:10], 'inquiry_ctime_id'),
+        ('oplog.ip', OpLog.objects.filter(re_ip='127.0.0.1', re_time__gte=since).order_by('-re_time')[:10],
+         'oplog_ip_time'),
+        ('oplog.recent', OpLog.objects.filter(re_time__gte=since), 're_time'),
+        ('security.type', SecurityEvent.objects.filter(incident_type='LOGIN_FAILURE').order_by('-create_time')[:10],
+         'se_type_time'),
+        ('security.level', SecurityEvent.objects.filter(level='HIGH').order_by('-create_time')[:10], 'se_level_time'),
+        ('search.terms', SearchPosting.objects.filter(term__in=['led', '台灯']), 'search_term_thing'),
+    ]
+    for name, module in (('thing', thing), ('news', news), ('case', case), ('faq', faq), ('download', download)):
+        queryset = module.section_queryset()
+        index = 'thing_status_ctime_id' if name == 'thing' else f'{name}_ctime_id'
+        queries.append((f'{name}.cursor', pagination.KeysetPagination.get_queryset(queryset)[:page], index))
+        queries.append((f'{name}.cursor_next', pagination.KeysetPagination.get_queryset(queryset, cursor)[:page],
+                        index))
+    return queries
+
+
+def explain(queryset):
+    """
+    返回 (是否全表扫描, 是否额外排序, 使用的索引名集合, 执行计划文本)
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+            # SCAN <表> 为全表扫描, SCAN <表> USING INDEX 为按索引顺序扫描
+            full_scan = any(d.startswith('SCAN ') and ' USING ' not in d for d in details)
+            sort = any('TEMP B-TREE' in d for d in details)
+            indexes = {m.group(1) for d in details for m in SQLITE_INDEX_RE.finditer(d)}
+            return full_scan, sort, indexes, '; '.join(details)
+
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            # 有可用索引而优化器仍选择全表扫描同样视为退化
+            full_scan = any(row['type'] == 'ALL' for row in rows)
+            sort = any('filesort' in (row['Extra'] or '') for row in rows)
+            plan = '; '.join(f"{row['table']}: {row['type']} key={row['key']} {row['Extra'] or ''}".strip()
+                             for row in rows)
+            indexes = {row['key'] for row in rows if row['key']}
+            return full_scan, sort, indexes, plan
+
+    raise CommandError(f"不支持的数据库: {connection.vendor}")
+
+
+class Command(BaseCommand):
+    help = '对热点列表查询执行EXPLAIN, 出现全表扫描、额外排序或未使用预期索引时返回失败'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--allow-sort', action='store_true', help='额外排序(filesort)只警告, 不视为失败')
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, queryset, expected in hot_queries():
+            expected = (expected,) if isinstance(expected, str) else expected
+            full_scan, sort, indexes, plan = explain(queryset)
+            # 只用上"某个索引"不够, 必须是为该查询建立的索引
+            if full_scan or not indexes & set(expected) or (sort and not options['allow_sort']):
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"  {name:<20} {plan} (应使用 {' / '.join(expected)})"))
+            elif sort:
+                self.stdout.write(self.style.WARNING(f"  {name:<20} {plan}"))
+            else:
+                self.stdout.write(f"  {name:<20} {plan}")
+
+        if failed:
+            raise CommandError(f"{len(failed)}个查询未通过执行计划检查: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("全部查询使用预期的索引"))
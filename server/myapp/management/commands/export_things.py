@@ -0,0 +1,24 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from myapp import thingio
+from myapp.models import Thing
+
+
+class Command(BaseCommand):
+    help = '流式导出全部产品为CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=thingio.FORMATS, default=thingio.FORMAT_CSV, help='文件格式')
+        parser.add_argument('--output', help='输出文件路径, 默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        things = Thing.objects.order_by('id')
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in thingio.export_things(things, options['format']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
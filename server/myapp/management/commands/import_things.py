@@ -0,0 +1,34 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import thingio
+
+
+class Command(BaseCommand):
+    help = '从CSV/NDJSON文件批量导入产品, 有id且已存在的行更新, 其余新建'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='文件路径')
+        parser.add_argument('--format', choices=thingio.FORMATS, help='文件格式, 默认按扩展名判断')
+        parser.add_argument('--chunk-size', type=int, default=thingio.CHUNK_SIZE, help='每块校验写入的行数')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in thingio.FORMATS:
+            raise CommandError('仅支持csv或ndjson格式')
+
+        started = time.time()
+        with open(path, 'rb') as stream:
+            result = thingio.import_things(stream, fmt, options['chunk_size'])
+
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(f"  第{error['line']}行: {error['errors']}"))
+        elapsed = round((time.time() - started) * 1000)
+        summary = f"完成: 新建{result.created}个, 更新{result.updated}个, 失败{result.failed}个, 耗时{elapsed}ms"
+        if result.failed:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.stats import visits
+
+
+class Command(BaseCommand):
+    help = '由访问日志重建按小时/天汇总的PV/UV, 用于初次部署或对账'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='重建最近多少天')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+        total = visits.rebuild(since)
+        self.stdout.write(self.style.SUCCESS(f"完成: 汇总{total}条访问日志"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from myapp.stats import counters
+
+
+class Command(BaseCommand):
+    help = '按数据库重新统计后台概览计数, 可由定时任务执行'
+
+    def handle(self, *args, **options):
+        row = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"完成: 今日询盘{row.inquiry_count}, 今日访客{row.visit_count}, "
+            f"产品{row.product_count}, 新闻{row.news_count}, 案例{row.case_count}"))
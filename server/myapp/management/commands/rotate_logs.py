@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import logstore
+
+
+class Command(BaseCommand):
+    help = '日志表预建分区并删除超出保留期的月份, 由定时任务每天执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-dir', default=getattr(settings, 'LOG_ARCHIVE_DIR', None),
+                            help='删除前把整月数据归档到该目录 (ndjson.gz)')
+        parser.add_argument('--no-archive', action='store_true', help='不归档直接删除')
+
+    def handle(self, *args, **options):
+        archive_dir = None if options['no_archive'] else options['archive_dir']
+        result = logstore.rotate(archive_dir)
+
+        failed = []
+        for table, info in result.items():
+            if 'error' in info:
+                failed.append(table)
+                self.stdout.write(self.style.ERROR(f"  {table:<20} 失败: {info['error']}"))
+                continue
+            created = ', '.join(info['created']) or '-'
+            expired = ', '.join(f"{month:%Y-%m}" + (f" -> {path}" if path else '')
+                                for month, path in info['expired']) or '-'
+            self.stdout.write(f"  {table:<20} 新建分区: {created}  删除月份: {expired}")
+
+        if failed:
+            raise CommandError(f"{len(failed)}张日志表轮转失败: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("完成"))
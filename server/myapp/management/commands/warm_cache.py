@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myapp.cache import warmup
+
+
+class Command(BaseCommand):
+    help = '预热前台页面缓存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int,
+                            default=getattr(settings, 'CACHE_WARM_PAGES', warmup.DEFAULT_PAGES),
+                            help='产品列表每个分类预热的页数')
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'CACHE_WARM_WORKERS', warmup.DEFAULT_WORKERS),
+                            help='并发线程数')
+
+    def handle(self, *args, **options):
+        targets = warmup.get_targets(options['pages'])
+        self.stdout.write(f"预热{len(targets)}个接口, 线程数{options['workers']}")
+
+        started = time.time()
+        results = warmup.warm(targets, options['workers'])
+
+        failed = 0
+        for name, status, elapsed in results:
+            if status == 200:
+                self.stdout.write(f"  {name:<48} {elapsed:>6}ms")
+            elif status == 404:
+                # 超出页数的分页
+                self.stdout.write(f"  {name:<48} {'无数据':>6}")
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"  {name:<48} {status}"))
+
+        total = round((time.time() - started) * 1000)
+        summary = f"完成: {len(results)}个接口, 失败{failed}个, 总耗时{total}ms"
+        if failed:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -1,54 +1,60 @@
 # -*- coding:utf-8 -*-
-import time
 import json
 
+from django.conf import settings
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
 from myapp import utils
-from myapp.serializers import OpLogSerializer
+from myapp.logwriter import oplog_writer, truncate
+from myapp.timing import RequestTiming, request_timed
 
 
 class OpLogs(MiddlewareMixin):
-
-    def __init__(self, *args):
-        super(OpLogs, self).__init__(*args)
-
-        self.start_time = None  # 开始时间
-        self.end_time = None  # 响应时间
-        self.data = {}  # dict数据
+    """
+    访问日志
+    计时数据挂在request.timing上(见myapp.timing), 不保存在中间件实例中, 线程之间互不干扰
+    """
 
     def process_request(self, request):
+        request.timing = RequestTiming()  # 开始时间
+        request.timing.begin('middleware')
 
-        self.start_time = time.time()  # 开始时间
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing.finish('middleware')
+        request.timing.begin('view')
 
-        re_ip = utils.get_ip(request)
-        re_method = request.method
-
-        self.data.update(
-            {
-                're_url': request.path,
-                're_method': re_method,
-                're_ip': re_ip,
-                # 're_content': re_content,
-            }
-        )
-        # print(self.data)
+    def process_template_response(self, request, response):
+        # DRF的Response在这之后渲染
+        request.timing.finish('view')
+        request.timing.begin('render')
+        return response
 
     def process_response(self, request, response):
+        timing = getattr(request, 'timing', None)
+        if timing is None:
+            return response
+        timing.stop()
+
+        if settings.DEBUG:
+            response['Server-Timing'] = timing.server_timing()
+        request_timed.send(sender=self.__class__, request=request, timing=timing)
 
         # 资源请求url不入库
         if "/upload/" in request.path:
             return response
 
-        # 耗时毫秒/ms
-        self.end_time = time.time()  # 响应时间
-        access_time = self.end_time - self.start_time
-        self.data['access_time'] = str(round(access_time * 1000))
-        self.data['re_url'] = request.path
-
-        # 入库
-        serializer = OpLogSerializer(data=self.data)
-        if serializer.is_valid():
-            serializer.save()
+        data = {
+            're_url': request.path,
+            're_method': request.method,
+            're_ip': utils.get_ip(request),
+            # 耗时毫秒/ms
+            'access_time': str(round(timing.total_ms)),
+        }
+
+        # 放入写入队列, 由后台线程批量入库, 请求中不访问日志表
+        record = {field: truncate(value, 'myapp.OpLog', field) for field, value in data.items()}
+        record['re_time'] = timezone.now()
+        oplog_writer.put(record)
 
         return response
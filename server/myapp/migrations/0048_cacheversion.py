@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0047_alter_userdevice_device_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_cache_version',
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:40
+
+import html
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+# 迁移时的分词逻辑副本(myapp.search.tokenizer), 迁移不依赖之后会变化的应用代码
+MAX_TERM_LENGTH = 64
+FIELD_WEIGHTS = {
+    'title': 3,
+    'seo_keywords': 2,
+    'summary': 1,
+    'properties': 1,
+    'description': 1,
+}
+BATCH_SIZE = 500
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_CJK = '぀-ヿ㐀-䶿一-鿿가-힯豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[^\W_{_CJK}]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+
+def analyze(thing):
+    """加权词频"""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = getattr(thing, field)
+        if not text:
+            continue
+        text = unicodedata.normalize('NFKC', html.unescape(_TAG_RE.sub(' ', text))).lower()
+        for run in _TOKEN_RE.findall(text):
+            if _CJK_RE.match(run):
+                terms = list(run)
+                if len(run) > 1:
+                    terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                terms = [run[:MAX_TERM_LENGTH]]
+            for term in terms:
+                tf[term] += weight
+    return tf
+
+
+def build_index(apps, schema_editor):
+    document_model = apps.get_model('myapp', 'SearchDocument')
+    posting_model = apps.get_model('myapp', 'SearchPosting')
+    postings = []
+    documents = []
+    for thing in apps.get_model('myapp', 'Thing').objects.only('id', *FIELD_WEIGHTS).iterator(chunk_size=BATCH_SIZE):
+        tf = analyze(thing)
+        postings.extend(posting_model(term=term, thing_id=thing.pk, tf=count) for term, count in tf.items())
+        documents.append(document_model(thing_id=thing.pk, length=sum(tf.values())))
+        if len(postings) >= BATCH_SIZE:
+            posting_model.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+            postings = []
+    posting_model.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+    document_model.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0048_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('thing_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('length', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'b_search_document',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('term', models.CharField(max_length=64)),
+                ('thing_id', models.BigIntegerField(db_index=True)),
+                ('tf', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'b_search_posting',
+                'indexes': [models.Index(fields=['term', 'thing_id'], name='search_term_thing')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+def sync_flags(apps, schema_editor):
+    Thing = apps.get_model('myapp', 'Thing')
+    Thing.objects.filter(dimension__icontains='feature').update(is_featured=True)
+    Thing.objects.filter(dimension__icontains='recommend').update(is_recommended=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0049_searchdocument_searchposting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thing',
+            name='is_featured',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='thing',
+            name='is_recommended',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(sync_flags, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['is_featured', 'status', '-create_time'], name='thing_featured'),
+        ),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['is_recommended', 'status', '-create_time'], name='thing_recommended'),
+        ),
+    ]
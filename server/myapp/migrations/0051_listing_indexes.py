@@ -0,0 +1,61 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0050_thing_flags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['status', '-create_time'], name='thing_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['category', 'status', '-create_time'], name='thing_cat_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['status', '-create_time'], name='news_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['status', '-create_time'], name='case_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['status', '-create_time'], name='faq_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['status', '-create_time'], name='inquiry_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['status', '-create_time'], name='download_status_ctime'),
+        ),
+        migrations.AddIndex(
+            model_name='oplog',
+            index=models.Index(fields=['re_ip', 're_time'], name='oplog_ip_time'),
+        ),
+        migrations.RemoveIndex(
+            model_name='securityevent',
+            name='se_incident_type',
+        ),
+        migrations.RemoveIndex(
+            model_name='securityevent',
+            name='se_level',
+        ),
+        migrations.AddIndex(
+            model_name='securityevent',
+            index=models.Index(fields=['incident_type', 'create_time'], name='se_type_time'),
+        ),
+        migrations.AddIndex(
+            model_name='securityevent',
+            index=models.Index(fields=['level', 'create_time'], name='se_level_time'),
+        ),
+    ]
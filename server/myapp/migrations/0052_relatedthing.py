@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0051_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedThing',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('rank', models.IntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('related', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='related_to', to='myapp.thing')),
+                ('thing', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='myapp.thing')),
+            ],
+            options={
+                'db_table': 'b_related_thing',
+                'indexes': [models.Index(fields=['thing', 'rank'], name='related_thing_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0052_relatedthing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['status', '-pv'], name='thing_status_pv'),
+        ),
+    ]
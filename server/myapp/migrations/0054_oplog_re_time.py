@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0053_thing_status_pv'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='oplog',
+            name='re_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+    ]
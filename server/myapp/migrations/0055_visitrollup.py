@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0054_oplog_re_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(max_length=4)),
+                ('start', models.DateTimeField()),
+                ('pv', models.BigIntegerField(default=0)),
+                ('uv', models.IntegerField(default=0)),
+                ('uv_sketch', models.BinaryField(null=True)),
+            ],
+            options={
+                'db_table': 'b_visit_rollup',
+                'unique_together': {('period', 'start')},
+            },
+        ),
+    ]
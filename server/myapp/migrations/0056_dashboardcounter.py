@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0055_visitrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField(null=True)),
+                ('inquiry_count', models.IntegerField(default=0)),
+                ('visit_count', models.IntegerField(default=0)),
+                ('product_count', models.IntegerField(default=0)),
+                ('news_count', models.IntegerField(default=0)),
+                ('case_count', models.IntegerField(default=0)),
+                ('reconcile_time', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': 'b_dashboard_counter',
+            },
+        ),
+    ]
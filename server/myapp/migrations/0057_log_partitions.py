@@ -0,0 +1,128 @@
+# Generated by Django 4.2.27 on 2026-10-18 12:40
+
+from datetime import datetime
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# 没有时间的旧记录补为很早的时间, 分区时归入p_old分区, 下次轮转时删除
+MISSING_TIME = datetime(2000, 1, 1)
+
+# 以下为迁移时的分区逻辑副本(myapp.logstore), 迁移不依赖之后会变化的应用代码
+# 日志模型 -> 分区时间列
+LOG_MODELS = {
+    'myapp.OpLog': 're_time',
+    'myapp.ErrorLog': 'log_time',
+    'myapp.SecurityEvent': 'create_time',
+}
+DEFAULT_RETENTION_MONTHS = {
+    'myapp.OpLog': 6,
+    'myapp.ErrorLog': 12,
+    'myapp.SecurityEvent': 24,
+}
+PARTITIONS_AHEAD = 2
+MAX_PARTITION = 'pmax'
+OLD_PARTITION = 'p_old'
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def less_than(value):
+    return f"VALUES LESS THAN ('{value:%Y-%m-%d %H:%M:%S}')"
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+            [table],
+        )
+        return cursor.fetchone()[0] > 0
+
+
+def fill_missing_time(apps, schema_editor):
+    for label, field in LOG_MODELS.items():
+        model = apps.get_model(label)
+        model.objects.filter(**{f'{field}__isnull': True}).update(**{field: MISSING_TIME})
+
+
+def partition_logs(apps, schema_editor):
+    """
+    MySQL上把日志表改为按月 RANGE COLUMNS 分区, 主键改为(id, 时间列)
+    保留期之前的数据只放一个p_old分区, 按月分区从保留期起点开始
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+    qn = connection.ops.quote_name
+    retention = getattr(settings, 'LOG_RETENTION_MONTHS', {})
+    now = timezone.now()
+    now_month = datetime(now.year, now.month, 1)
+    for label, field in LOG_MODELS.items():
+        model = apps.get_model(label)
+        table = model._meta.db_table
+        if is_partitioned(connection, table):
+            continue
+
+        months = retention.get(label, DEFAULT_RETENTION_MONTHS[label])
+        month = add_months(now_month, 1 - months) if months else now_month
+        defs = []
+        if model.objects.filter(**{f'{field}__lt': month}).exists():
+            defs.append(f"PARTITION {OLD_PARTITION} {less_than(month)}")
+        last = add_months(now_month, PARTITIONS_AHEAD)
+        while month <= last:
+            defs.append(f"PARTITION p{month:%Y%m} {less_than(add_months(month, 1))}")
+            month = add_months(month, 1)
+        defs.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+
+        column = qn(model._meta.get_field(field).column)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} DROP PRIMARY KEY, ADD PRIMARY KEY ({qn('id')}, {column})")
+            cursor.execute(f"ALTER TABLE {qn(table)} PARTITION BY RANGE COLUMNS({column}) ({', '.join(defs)})")
+
+
+def unpartition_logs(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+    qn = connection.ops.quote_name
+    for label in LOG_MODELS:
+        table = apps.get_model(label)._meta.db_table
+        if not is_partitioned(connection, table):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} REMOVE PARTITIONING")
+            cursor.execute(f"ALTER TABLE {qn(table)} DROP PRIMARY KEY, ADD PRIMARY KEY ({qn('id')})")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0056_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_missing_time, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='oplog',
+            name='re_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='errorlog',
+            name='log_time',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='securityevent',
+            name='create_time',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.RunPython(partition_logs, unpartition_logs),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0057_log_partitions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='thing',
+            name='thing_status_pv',
+        ),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['status', '-pv', '-id'], name='thing_status_pv_id'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.27 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0058_thing_status_pv_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='thing',
+            name='thing_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['status', '-create_time', '-id'], name='thing_status_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='thing',
+            name='thing_cat_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='thing',
+            index=models.Index(fields=['category', 'status', '-create_time', '-id'], name='thing_cat_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='news',
+            name='news_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-create_time', '-id'], name='news_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='case',
+            name='case_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['-create_time', '-id'], name='case_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='faq',
+            name='faq_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['-create_time', '-id'], name='faq_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='inquiry',
+            name='inquiry_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['-create_time', '-id'], name='inquiry_ctime_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='download',
+            name='download_status_ctime',
+        ),
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['-create_time', '-id'], name='download_ctime_id'),
+        ),
+    ]
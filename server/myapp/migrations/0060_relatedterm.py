@@ -0,0 +1,79 @@
+# Generated by Django 4.2.27 on 2026-10-18 16:10
+
+import html
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+# 迁移时的分词逻辑副本(myapp.search.tokenizer), 迁移不依赖之后会变化的应用代码
+MAX_TERM_LENGTH = 64
+FIELD_WEIGHTS = {
+    'title': 3,
+    'summary': 1,
+    'properties': 1,
+}
+BATCH_SIZE = 500
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_CJK = '぀-ヿ㐀-䶿一-鿿가-힯豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[^\W_{_CJK}]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+
+def analyze(thing):
+    """加权词频"""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = getattr(thing, field)
+        if not text:
+            continue
+        text = unicodedata.normalize('NFKC', html.unescape(_TAG_RE.sub(' ', text))).lower()
+        for run in _TOKEN_RE.findall(text):
+            if _CJK_RE.match(run):
+                terms = list(run)
+                if len(run) > 1:
+                    terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                terms = [run[:MAX_TERM_LENGTH]]
+            for term in terms:
+                tf[term] += weight
+    return tf
+
+
+def build_terms(apps, schema_editor):
+    """填充上架产品的词项, 相关产品列表本身由build_related_things重算"""
+    term_model = apps.get_model('myapp', 'RelatedTerm')
+    things = apps.get_model('myapp', 'Thing').objects.filter(status=0).only('id', *FIELD_WEIGHTS)
+    records = []
+    for thing in things.iterator(chunk_size=BATCH_SIZE):
+        records.extend(term_model(term=term, thing_id=thing.pk, tf=count) for term, count in analyze(thing).items())
+        if len(records) >= BATCH_SIZE:
+            term_model.objects.bulk_create(records, batch_size=BATCH_SIZE)
+            records = []
+    term_model.objects.bulk_create(records, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0059_listing_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedTerm',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('term', models.CharField(max_length=64)),
+                ('thing_id', models.BigIntegerField(db_index=True)),
+                ('tf', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'b_related_term',
+                'indexes': [models.Index(fields=['term', 'thing_id'], name='related_term_thing')],
+            },
+        ),
+        migrations.RunPython(build_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:30
+
+import hashlib
+import math
+import zlib
+from collections import defaultdict
+
+from django.db import migrations
+
+# 以下为迁移时的汇总逻辑副本(myapp.stats.visits / myapp.stats.hll), 迁移不依赖之后会变化的应用代码
+# 草图格式与HyperLogLog.to_bytes()一致: 1字节精度 + zlib压缩的寄存器
+PRECISION = 12
+BATCH_SIZE = 2000
+
+
+class Sketch:
+
+    def __init__(self):
+        self.registers = bytearray(1 << PRECISION)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.sha1(str(value).encode('utf-8')).digest()[:8], 'big')
+        index = x >> (64 - PRECISION)
+        rest = x & ((1 << (64 - PRECISION)) - 1)
+        rank = (64 - PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes([PRECISION]) + zlib.compress(bytes(self.registers))
+
+
+def backfill(apps, schema_editor):
+    """
+    由已有的访问日志生成按小时/天的汇总, 部署后概览图表不再为空
+    已有汇总(如已执行rebuild_visit_rollups)时跳过
+    """
+    rollup_model = apps.get_model('myapp', 'VisitRollup')
+    if rollup_model.objects.exists():
+        return
+
+    groups = defaultdict(lambda: [0, Sketch()])
+    rows = apps.get_model('myapp', 'OpLog').objects.values_list('re_time', 're_ip')
+    for re_time, re_ip in rows.iterator(chunk_size=BATCH_SIZE):
+        if re_time is None:
+            continue
+        hour = re_time.replace(minute=0, second=0, microsecond=0)
+        for key in (('hour', hour), ('day', hour.replace(hour=0))):
+            group = groups[key]
+            group[0] += 1
+            if re_ip:
+                group[1].add(re_ip)
+
+    rollup_model.objects.bulk_create(
+        [rollup_model(period=period, start=start, pv=pv, uv=sketch.count(), uv_sketch=sketch.to_bytes())
+         for (period, start), (pv, sketch) in groups.items()],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0060_relatedterm'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.utils import timezone
+
+from myapp.cache import solo, category_tree
+from myapp.search import index as search_index, related as related_things
+from myapp.stats import counters  # 注册后台概览计数的信号
 
 
 class User(models.Model):
@@ -67,6 +71,11 @@ class Category(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        category_tree.bump_version()
+        return result
+
     class Meta:
         db_table = "b_category"
 
@@ -93,9 +102,59 @@ class Thing(models.Model):
     create_time = models.DateTimeField(auto_now_add=True, null=True)
     pv = models.IntegerField(default=0)
     rate = models.IntegerField(default=3)  # 评分
+    # 由dimension同步的标记, 与状态、时间组成索引
+    is_featured = models.BooleanField(default=False)
+    is_recommended = models.BooleanField(default=False)
+
+    # dimension中的取值 -> 标记字段
+    FLAG_FEATURED = 'is_featured'
+    FLAG_RECOMMENDED = 'is_recommended'
+    DIMENSION_FLAGS = {
+        'feature': FLAG_FEATURED,
+        'recommend': FLAG_RECOMMENDED,
+    }
+
+    def sync_flags(self):
+        """按dimension设置标记字段"""
+        dimension = (self.dimension or '').lower()
+        for value, field in self.DIMENSION_FLAGS.items():
+            setattr(self, field, value in dimension)
+
+    @classmethod
+    def flagged(cls, flag, limit):
+        """
+        带标记的上架产品, 按创建时间倒序
+        用 IN (1) 而不是 flag=True: SQLite上后者编译为裸布尔条件, 不能作为(标记, status, create_time)索引的等值条件
+        """
+        return cls.objects.filter(**{f'{flag}__in': [True]}, status=0).select_related('category') \
+            .order_by('-create_time')[:limit]
+
+    @classmethod
+    def most_viewed(cls, limit):
+        """浏览量最高的上架产品, 走(status, pv, id)索引, 不扫描也不额外排序"""
+        return cls.objects.filter(status=0).select_related('category').order_by('-pv', '-id')[:limit]
+
+    def save(self, *args, **kwargs):
+        self.sync_flags()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'dimension' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set(self.DIMENSION_FLAGS.values())
+        result = super().save(*args, **kwargs)
+        if update_fields is None or set(update_fields) & set(search_index.FIELD_WEIGHTS):
+            search_index.index_thing(self)
+        if update_fields is None or set(update_fields) & {*related_things.FIELD_WEIGHTS, 'status', 'category'}:
+            related_things.schedule_refresh(self.pk)
+        return result
 
     class Meta:
         db_table = "b_thing"
+        indexes = [
+            models.Index(fields=['is_featured', 'status', '-create_time'], name='thing_featured'),
+            models.Index(fields=['is_recommended', 'status', '-create_time'], name='thing_recommended'),
+            models.Index(fields=['status', '-create_time', '-id'], name='thing_status_ctime_id'),
+            models.Index(fields=['category', 'status', '-create_time', '-id'], name='thing_cat_ctime_id'),
+            models.Index(fields=['status', '-pv', '-id'], name='thing_status_pv_id'),
+        ]
 
 
 class News(models.Model):
@@ -118,6 +177,9 @@ class News(models.Model):
 
     class Meta:
         db_table = "b_news"
+        indexes = [
+            models.Index(fields=['-create_time', '-id'], name='news_ctime_id'),
+        ]
 
 
 class Case(models.Model):
@@ -139,6 +201,9 @@ class Case(models.Model):
 
     class Meta:
         db_table = "b_case"
+        indexes = [
+            models.Index(fields=['-create_time', '-id'], name='case_ctime_id'),
+        ]
 
 
 class Faq(models.Model):
@@ -155,6 +220,9 @@ class Faq(models.Model):
 
     class Meta:
         db_table = "b_faq"
+        indexes = [
+            models.Index(fields=['-create_time', '-id'], name='faq_ctime_id'),
+        ]
 
 
 class Inquiry(models.Model):
@@ -175,6 +243,9 @@ class Inquiry(models.Model):
 
     class Meta:
         db_table = "b_inquiry"
+        indexes = [
+            models.Index(fields=['-create_time', '-id'], name='inquiry_ctime_id'),
+        ]
 
 
 class Download(models.Model):
@@ -193,6 +264,9 @@ class Download(models.Model):
 
     class Meta:
         db_table = "b_download"
+        indexes = [
+            models.Index(fields=['-create_time', '-id'], name='download_ctime_id'),
+        ]
 
 
 class BasicSite(models.Model):
@@ -219,15 +293,14 @@ class BasicSite(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and BasicSite.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
 
 
 class BasicTdk(models.Model):
@@ -262,15 +335,14 @@ class BasicTdk(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and BasicTdk.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
 
 
 class BasicBanner(models.Model):
@@ -289,15 +361,14 @@ class BasicBanner(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and BasicBanner.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
 
 
 class BasicGlobal(models.Model):
@@ -320,15 +391,14 @@ class BasicGlobal(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and BasicGlobal.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
 
 
 class BasicAdditional(models.Model):
@@ -359,15 +429,14 @@ class BasicAdditional(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and BasicAdditional.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
 
 
 class Comment(models.Model):
@@ -401,21 +470,36 @@ class About(models.Model):
 
     @classmethod
     def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            return None
+        return solo.get_solo(cls)
 
     def save(self, *args, **kwargs):
         if not self.pk and About.objects.exists():
             raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        solo.bump_version()
+        return result
+
+
+class CacheVersion(models.Model):
+    """
+    缓存版本号
+    各进程据此判断进程内快照是否过期
+    """
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_cache_version"
 
 
 class OpLog(models.Model):
     id = models.BigAutoField(primary_key=True)
     re_ip = models.CharField(max_length=100, blank=True, null=True)
-    re_time = models.DateTimeField(auto_now_add=True, null=True)
+    # 异步批量写入, 由请求时的时间决定, 不用auto_now_add(写入时才取时间)
+    # 日志表在MySQL上按时间列分区 (见myapp.logstore), 时间列不能为空
+    re_time = models.DateTimeField(default=timezone.now)
     re_url = models.CharField(max_length=200, blank=True, null=True)
     re_method = models.CharField(max_length=10, blank=True, null=True)
     re_content = models.CharField(max_length=200, blank=True, null=True)
@@ -425,6 +509,7 @@ class OpLog(models.Model):
         db_table = "b_op_log"
         indexes = [
             models.Index(fields=['re_time'], name='re_time'),  # 指定索引名称
+            models.Index(fields=['re_ip', 're_time'], name='oplog_ip_time'),
         ]
 
 
@@ -434,7 +519,7 @@ class ErrorLog(models.Model):
     url = models.CharField(max_length=200, blank=True, null=True)
     method = models.CharField(max_length=10, blank=True, null=True)
     content = models.CharField(max_length=200, blank=True, null=True)
-    log_time = models.DateTimeField(auto_now_add=True, null=True)
+    log_time = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "b_error_log"
@@ -476,14 +561,14 @@ class SecurityEvent(models.Model):
     is_resolved = models.BooleanField(default=False)
     resolved_by = models.CharField(max_length=50, blank=True, null=True)
     resolved_time = models.DateTimeField(blank=True, null=True)
-    create_time = models.DateTimeField(auto_now_add=True, null=True)
+    create_time = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "b_security_event"
         indexes = [
             models.Index(fields=['create_time'], name='se_create_time'),
-            models.Index(fields=['incident_type'], name='se_incident_type'),
-            models.Index(fields=['level'], name='se_level'),
+            models.Index(fields=['incident_type', 'create_time'], name='se_type_time'),
+            models.Index(fields=['level', 'create_time'], name='se_level_time'),
         ]
 
 
@@ -541,3 +626,108 @@ class PasswordHistory(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.created_at}"
+
+
+class SearchDocument(models.Model):
+    """
+    产品全文索引的文档
+    length: 加权词项总数, 用于BM25长度归一化
+    """
+    thing_id = models.BigIntegerField(primary_key=True)
+    length = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "b_search_document"
+
+
+class SearchPosting(models.Model):
+    """
+    产品全文索引的倒排记录
+    tf: 词项在各字段中按权重累计的词频
+    """
+    id = models.BigAutoField(primary_key=True)
+    term = models.CharField(max_length=64)
+    thing_id = models.BigIntegerField(db_index=True)
+    tf = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "b_search_posting"
+        indexes = [
+            models.Index(fields=['term', 'thing_id'], name='search_term_thing'),
+        ]
+
+
+class RelatedThing(models.Model):
+    """
+    预先计算的相关产品
+    rank: 从0开始的排名, score: 余弦相似度, 同分类补足的为0
+    产品删除后记录保留到下一次刷新, 读取时与产品表关联过滤
+    """
+    id = models.BigAutoField(primary_key=True)
+    thing = models.ForeignKey(Thing, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    related = models.ForeignKey(Thing, on_delete=models.DO_NOTHING, db_constraint=False, related_name='related_to')
+    rank = models.IntegerField(default=0)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        db_table = "b_related_thing"
+        indexes = [
+            models.Index(fields=['thing', 'rank'], name='related_thing_rank'),
+        ]
+
+
+class RelatedTerm(models.Model):
+    """
+    相关产品计算用的上架产品词项, 增量刷新时只读取受影响产品的词项
+    tf: 词项在各字段中按权重累计的词频
+    """
+    id = models.BigAutoField(primary_key=True)
+    term = models.CharField(max_length=64)
+    thing_id = models.BigIntegerField(db_index=True)
+    tf = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "b_related_term"
+        indexes = [
+            models.Index(fields=['term', 'thing_id'], name='related_term_thing'),
+        ]
+
+
+class VisitRollup(models.Model):
+    """
+    访问量汇总, 访问日志批量写入时增量更新
+    period: hour/day, start: 时段开始时间
+    uv_sketch: 访客IP的HyperLogLog草图, 可合并为更长时段的UV; uv为其估算值
+    """
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+
+    id = models.BigAutoField(primary_key=True)
+    period = models.CharField(max_length=4)
+    start = models.DateTimeField()
+    pv = models.BigIntegerField(default=0)
+    uv = models.IntegerField(default=0)
+    uv_sketch = models.BinaryField(null=True)
+
+    class Meta:
+        db_table = "b_visit_rollup"
+        unique_together = [['period', 'start']]
+
+
+class DashboardCounter(models.Model):
+    """
+    后台概览的计数, 只有一行
+    模型保存/删除和访问日志写入时增量更新, 定期与数据库对账 (见myapp.stats.counters)
+    day: inquiry_count/visit_count所属的日期
+    """
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField(null=True)
+    inquiry_count = models.IntegerField(default=0)
+    visit_count = models.IntegerField(default=0)
+    product_count = models.IntegerField(default=0)
+    news_count = models.IntegerField(default=0)
+    case_count = models.IntegerField(default=0)
+    reconcile_time = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "b_dashboard_counter"
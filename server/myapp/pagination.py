@@ -0,0 +1,155 @@
+"""
+列表分页
+游标分页: 按 (create_time, id) 降序做键集分页, 翻到任何一页都只扫描一页的数据, 不使用OFFSET
+请求参数 paging=cursor 时启用, 否则沿用 page/pageSize 页码分页
+页码分页: 可传入缓存的总数, 避免每次请求都执行count()
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+
+PAGING_QUERY_PARAM = 'paging'
+CURSOR_MODE = 'cursor'
+
+# 缓存键需要包含的分页参数及默认值
+SECTION_PARAMS = {PAGING_QUERY_PARAM: 'page', 'cursor': ''}
+
+NEXT = 'n'
+PREV = 'p'
+
+
+def cursor_requested(request):
+    """请求是否使用游标分页"""
+    return request.GET.get(PAGING_QUERY_PARAM) == CURSOR_MODE
+
+
+class KeysetPagination:
+    """
+    键集分页
+
+    游标为base64编码的 {'t': create_time, 'i': id, 'd': 方向}, 对客户端不透明;
+    create_time为空的记录排在最后, 按id降序
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'pageSize'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=9):
+        self.page_size = page_size
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, obj, direction):
+        create_time = obj.create_time.isoformat() if obj.create_time else None
+        data = json.dumps({'t': create_time, 'i': obj.pk, 'd': direction}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """返回 (create_time, id, 方向), 没有游标时返回None"""
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            create_time = datetime.fromisoformat(data['t']) if data['t'] else None
+            direction = data['d']
+            if direction not in (NEXT, PREV):
+                raise ValueError(direction)
+            return create_time, int(data['i']), direction
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _after(create_time, pk):
+        """排序在游标之后的记录"""
+        if create_time is None:
+            return Q(create_time__isnull=True, id__lt=pk)
+        return (Q(create_time__lt=create_time) | Q(create_time=create_time, id__lt=pk)
+                | Q(create_time__isnull=True))
+
+    @staticmethod
+    def _before(create_time, pk):
+        """排序在游标之前的记录"""
+        if create_time is None:
+            return Q(create_time__isnull=False) | Q(create_time__isnull=True, id__gt=pk)
+        return Q(create_time__gt=create_time) | Q(create_time=create_time, id__gt=pk)
+
+    @staticmethod
+    def get_queryset(queryset, cursor=None):
+        """
+        返回按游标过滤并排序的查询集, cursor为decode_cursor()的结果
+        MySQL和SQLite中NULL小于任何值, 降序时本来就排在最后, 直接按 (create_time, id) 排序即可走索引,
+        不使用nulls_last (MySQL上会生成 IS NULL 表达式排序, 无法使用索引)
+        """
+        queryset = queryset.order_by()
+        if cursor is None:
+            return queryset.order_by('-create_time', '-id')
+        create_time, pk, direction = cursor
+        if direction == NEXT:
+            return queryset.filter(KeysetPagination._after(create_time, pk)).order_by('-create_time', '-id')
+        return queryset.filter(KeysetPagination._before(create_time, pk)).order_by('create_time', 'id')
+
+    def paginate_queryset(self, queryset, request):
+        """
+        返回当前页的记录列表, 并设置 next_cursor / prev_cursor
+        queryset的排序会被替换为 (create_time, id) 降序
+        """
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        direction = cursor[2] if cursor is not None else NEXT
+        queryset = self.get_queryset(queryset, cursor)
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if direction == PREV:
+            results.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, cursor is not None
+
+        self.next_cursor = self.encode_cursor(results[-1], NEXT) if results and has_next else None
+        self.prev_cursor = self.encode_cursor(results[0], PREV) if results and has_prev else None
+        return results
+
+    def get_links(self):
+        return {'next': self.next_cursor, 'prev': self.prev_cursor}
+
+
+class CachedCountPaginator(Paginator):
+    """总数由调用方提供的Paginator, 避免再执行一次count()"""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """
+    页码分页
+    设置total后分页不再统计总数, total通常来自myapp.cache.counts.cached_count()
+    """
+
+    total = None
+
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(object_list, per_page, count=self.total)
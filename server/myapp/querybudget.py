@@ -0,0 +1,44 @@
+"""
+接口查询次数预算
+用 @query_budget(n) 在视图旁声明该接口(缓存未命中时)最多执行的SQL条数,
+运行时超出预算记录警告; manage.py check_query_budgets 逐个请求声明了预算的GET接口, 超出时返回失败
+"""
+import logging
+from functools import wraps
+
+from django.db import connection
+
+logger = logging.getLogger('myapp')
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(max_queries, sample=None):
+    """
+    用作装饰器, 放在@api_view之上
+    max_queries: 允许的最大查询次数
+    sample: 无参函数, 返回检查时使用的查询参数, 如详情页需要一个存在的id
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = view_func(request, *args, **kwargs)
+            if counter.count > max_queries:
+                logger.warning(f"查询次数超出预算: {request.path} {counter.count}/{max_queries}")
+            return response
+
+        _wrapped_view.query_budget = max_queries
+        _wrapped_view.query_budget_sample = sample
+        return _wrapped_view
+
+    return decorator
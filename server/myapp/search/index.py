@@ -0,0 +1,195 @@
+"""
+产品全文检索
+倒排索引保存在b_search_posting(词项 -> 产品, 加权词频)和b_search_document(产品 -> 文档长度)中,
+产品保存/删除时增量更新; 查询时取出查询词项的倒排记录, 要求命中全部词项, 按BM25打分排序
+纯ORM实现, MySQL和SQLite均可使用
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.signals import post_delete
+
+from myapp.search.tokenizer import tokenize
+
+# 参与索引的字段及权重
+FIELD_WEIGHTS = {
+    'title': 3,
+    'seo_keywords': 2,
+    'summary': 1,
+    'properties': 1,
+    'description': 1,
+}
+
+# BM25参数
+K1 = 1.2
+B = 0.75
+
+BATCH_SIZE = 500
+
+
+def _models():
+    return apps.get_model('myapp', 'SearchDocument'), apps.get_model('myapp', 'SearchPosting')
+
+
+def analyze(thing):
+    """
+    返回 (加权词频, 文档长度)
+    """
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(thing, field, None)):
+            tf[term] += weight
+    return tf, sum(tf.values())
+
+
+def index_thing(thing):
+    """重建单个产品的索引"""
+    document_model, posting_model = _models()
+    tf, length = analyze(thing)
+    with transaction.atomic():
+        posting_model.objects.filter(thing_id=thing.pk).delete()
+        posting_model.objects.bulk_create(
+            [posting_model(term=term, thing_id=thing.pk, tf=count) for term, count in tf.items()],
+            batch_size=BATCH_SIZE,
+        )
+        document_model.objects.update_or_create(thing_id=thing.pk, defaults={'length': length})
+
+
+def index_things(things):
+    """重建多个产品的索引, things为Thing查询集或列表"""
+    document_model, posting_model = _models()
+    ids = []
+    postings = []
+    documents = []
+    for thing in things:
+        tf, length = analyze(thing)
+        ids.append(thing.pk)
+        postings.extend(posting_model(term=term, thing_id=thing.pk, tf=count) for term, count in tf.items())
+        documents.append(document_model(thing_id=thing.pk, length=length))
+    with transaction.atomic():
+        posting_model.objects.filter(thing_id__in=ids).delete()
+        document_model.objects.filter(thing_id__in=ids).delete()
+        posting_model.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        document_model.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+    return len(ids)
+
+
+def remove_thing(thing_id):
+    """删除单个产品的索引"""
+    document_model, posting_model = _models()
+    with transaction.atomic():
+        posting_model.objects.filter(thing_id=thing_id).delete()
+        document_model.objects.filter(thing_id=thing_id).delete()
+
+
+def rebuild(things, document_model=None, posting_model=None):
+    """
+    清空并重建索引, 返回索引的产品数
+    things: Thing查询集
+    document_model/posting_model: 迁移中传入历史模型
+    """
+    if document_model is None or posting_model is None:
+        document_model, posting_model = _models()
+    total = 0
+    with transaction.atomic():
+        posting_model.objects.all().delete()
+        document_model.objects.all().delete()
+
+        postings = []
+        documents = []
+        for thing in things.only('id', *FIELD_WEIGHTS).iterator(chunk_size=BATCH_SIZE):
+            tf, length = analyze(thing)
+            postings.extend(posting_model(term=term, thing_id=thing.pk, tf=count) for term, count in tf.items())
+            documents.append(document_model(thing_id=thing.pk, length=length))
+            total += 1
+            if len(postings) >= BATCH_SIZE:
+                posting_model.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+                postings = []
+        posting_model.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        document_model.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+    return total
+
+
+def search(query, scope=None):
+    """
+    返回按相关度降序排列的全部命中产品id
+    scope: Thing查询集, 只在其中的产品里检索(如只检索上架产品), 在打分排序之前过滤
+    """
+    terms = set(tokenize(query, query=True))
+    if not terms:
+        return []
+
+    document_model, posting_model = _models()
+
+    # doc -> {term: tf}
+    postings = defaultdict(dict)
+    df = Counter()
+    rows = posting_model.objects.filter(term__in=terms)
+    if scope is not None:
+        rows = rows.filter(thing_id__in=scope.order_by().values('id'))
+    for term, thing_id, tf in rows.values_list('term', 'thing_id', 'tf'):
+        postings[thing_id][term] = tf
+        df[term] += 1
+
+    # 必须命中全部词项
+    matched = [thing_id for thing_id, doc_terms in postings.items() if len(doc_terms) == len(terms)]
+    if not matched:
+        return []
+
+    stats = document_model.objects.aggregate(total=Count('thing_id'), avg_length=Avg('length'))
+    total = stats['total'] or 1
+    avg_length = stats['avg_length'] or 1
+    lengths = dict(document_model.objects.filter(thing_id__in=matched).values_list('thing_id', 'length'))
+
+    idf = {term: math.log(1 + (total - df[term] + 0.5) / (df[term] + 0.5)) for term in terms}
+
+    scores = []
+    for thing_id in matched:
+        norm = K1 * (1 - B + B * lengths.get(thing_id, avg_length) / avg_length)
+        score = sum(idf[term] * tf * (K1 + 1) / (tf + norm) for term, tf in postings[thing_id].items())
+        scores.append((score, thing_id))
+
+    scores.sort(key=lambda item: (-item[0], -item[1]))
+    return [thing_id for _, thing_id in scores]
+
+
+class SearchResults:
+    """
+    按相关度排序的搜索结果, 可直接交给分页器
+    count()为全部命中数; 切片时只查询该页的产品
+    """
+
+    def __init__(self, ids, queryset):
+        self.ids = ids
+        self.queryset = queryset
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        page_ids = self.ids[index]
+        things = self.queryset.in_bulk(page_ids)
+        return [things[thing_id] for thing_id in page_ids if thing_id in things]
+
+
+def results(queryset, query):
+    """
+    在queryset范围内检索, 返回SearchResults
+    """
+    return SearchResults(search(query, scope=queryset), queryset)
+
+
+def _on_thing_deleted(instance, **kwargs):
+    remove_thing(instance.pk)
+
+
+# 覆盖queryset批量删除, 批量删除不会调用Model.delete()
+post_delete.connect(_on_thing_deleted, sender='myapp.Thing', dispatch_uid='search_thing_deleted')
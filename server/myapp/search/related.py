@@ -0,0 +1,300 @@
+"""
+相关产品
+按标题/简介/属性的分词做TF-IDF向量, 以余弦相似度取每个上架产品的前K个相似产品,
+不足K个时用同分类最新的产品补足, 结果保存在b_related_thing中, 详情页一次索引查询读取
+
+上架产品的加权词频保存在b_related_term中, 产品保存/删除后延迟合并刷新: 只更新变化产品的词项,
+只重算受影响的产品: 自身、原列表中包含它的产品, 以及通过稀有词项找到的有限个邻居中
+与它的新相似度超过自身第K名的产品;
+产品总数变化对其他产品idf的微小影响不在增量刷新中重算, 由build_related_things全量重建修正
+"""
+import logging
+import math
+import threading
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete
+
+from myapp.search.tokenizer import tokenize
+
+logger = logging.getLogger('myapp')
+
+# 参与计算的字段及权重
+FIELD_WEIGHTS = {
+    'title': 3,
+    'summary': 1,
+    'properties': 1,
+}
+
+TOP_K = 8
+# 出现在超过该比例产品中的词项区分度太低, 不参与相似度计算
+MAX_DF_RATIO = 0.5
+# 增量刷新只通过出现在不超过该比例产品中的词项查找邻居, 按词项由稀到常最多检查MAX_NEIGHBORS个
+NEIGHBOR_MAX_DF_RATIO = 0.05
+MAX_NEIGHBORS = 200
+REFRESH_DELAY = 2  # 保存后延迟刷新的秒数, 期间的连续写入合并为一次刷新
+BATCH_SIZE = 500
+
+_pending_lock = threading.Lock()
+_pending_ids = set()
+_timer = None
+
+
+def _models():
+    return apps.get_model('myapp', 'Thing'), apps.get_model('myapp', 'RelatedThing'), \
+        apps.get_model('myapp', 'RelatedTerm')
+
+
+def analyze(row):
+    """返回产品的加权词频"""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(row[field]):
+            tf[term] += weight
+    return tf
+
+
+def max_df(total):
+    return max(2, total * MAX_DF_RATIO)
+
+
+class Corpus:
+    """
+    上架产品的稀疏向量
+    counts: {产品id: {词项: 加权词频}}, 只需包含参与计算的产品
+    df: {词项: 包含该词项的上架产品数}, total: 上架产品总数
+    recent: {分类id: [产品id]}, 按创建时间倒序, 用于补足
+    vectors: {产品id: {词项: 归一化权重}}
+    postings: {词项: [(产品id, 权重)]}
+    """
+
+    def __init__(self, counts, df, total, categories, recent):
+        self.counts = counts
+        self.categories = categories
+        self.recent = recent
+        limit = max_df(total)
+        idf = {term: math.log(1 + total / count) for term, count in df.items() if 1 < count <= limit}
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for thing_id, tf in counts.items():
+            vector = {term: (1 + math.log(count)) * idf[term] for term, count in tf.items() if term in idf}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1
+            vector = {term: w / norm for term, w in vector.items()}
+            self.vectors[thing_id] = vector
+            for term, w in vector.items():
+                self.postings[term].append((thing_id, w))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由全部上架产品生成, rows按创建时间倒序"""
+        counts = {}
+        df = Counter()
+        categories = {}
+        recent = defaultdict(list)
+        for row in rows:
+            tf = analyze(row)
+            counts[row['id']] = tf
+            df.update(tf.keys())
+            categories[row['id']] = row['category_id']
+            if row['category_id'] is not None:
+                recent[row['category_id']].append(row['id'])
+        return cls(counts, df, len(counts), categories, recent)
+
+    def similarity(self, thing_id, other):
+        vector = self.vectors.get(thing_id, {})
+        return sum(w * vector.get(term, 0) for term, w in self.vectors.get(other, {}).items())
+
+    def related(self, thing_id, k=TOP_K):
+        """
+        返回 [(相关产品id, 相似度)], 按相似度降序, 同分类补足的产品相似度为0
+        """
+        scores = defaultdict(float)
+        for term, w in self.vectors.get(thing_id, {}).items():
+            for other, other_w in self.postings[term]:
+                scores[other] += w * other_w
+        scores.pop(thing_id, None)
+
+        result = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:k]
+        if len(result) < k:
+            chosen = {other for other, _ in result}
+            for other in self.recent.get(self.categories.get(thing_id), []):
+                if len(result) >= k:
+                    break
+                if other != thing_id and other not in chosen:
+                    result.append((other, 0.0))
+        return result
+
+
+def _published(thing_model):
+    return thing_model.objects.filter(status=0).order_by('-create_time', '-id')
+
+
+def load_corpus():
+    thing_model, _, _ = _models()
+    return Corpus.from_rows(_published(thing_model).values('id', 'category_id', *FIELD_WEIGHTS))
+
+
+def _term_records(term_model, counts):
+    return [term_model(term=term, thing_id=thing_id, tf=count)
+            for thing_id, tf in counts.items() for term, count in tf.items()]
+
+
+def _write(corpus, thing_ids, related_model=None):
+    """重写指定产品的相关产品"""
+    if related_model is None:
+        _, related_model, _ = _models()
+    records = []
+    for thing_id in thing_ids:
+        if thing_id not in corpus.vectors:
+            continue
+        for rank, (other, score) in enumerate(corpus.related(thing_id)):
+            records.append(related_model(thing_id=thing_id, related_id=other, rank=rank, score=score))
+    with transaction.atomic():
+        related_model.objects.filter(thing_id__in=thing_ids).delete()
+        related_model.objects.bulk_create(records, batch_size=BATCH_SIZE)
+    return len(records)
+
+
+def rebuild(thing_model=None, related_model=None, term_model=None):
+    """
+    重算全部上架产品的词项和相关产品, 返回 (产品数, 记录数)
+    thing_model/related_model/term_model: 迁移中传入历史模型
+    """
+    if thing_model is None or related_model is None or term_model is None:
+        thing_model, related_model, term_model = _models()
+    corpus = Corpus.from_rows(_published(thing_model).values('id', 'category_id', *FIELD_WEIGHTS))
+    with transaction.atomic():
+        term_model.objects.all().delete()
+        term_model.objects.bulk_create(_term_records(term_model, corpus.counts), batch_size=BATCH_SIZE)
+        related_model.objects.all().delete()
+        total = _write(corpus, list(corpus.vectors), related_model)
+    return len(corpus.vectors), total
+
+
+def _document_frequencies(term_model, terms):
+    rows = term_model.objects.filter(term__in=terms).order_by().values('term').annotate(df=Count('id'))
+    return {row['term']: row['df'] for row in rows}
+
+
+def _load_counts(term_model, thing_ids):
+    counts = defaultdict(dict)
+    for thing_id, term, tf in term_model.objects.filter(thing_id__in=thing_ids).values_list('thing_id', 'term', 'tf'):
+        counts[thing_id][term] = tf
+    return counts
+
+
+def _closer_neighbors(term_model, related_model, changed, old_terms, total):
+    """
+    与变化产品有共同稀有词项、且与其新相似度超过自身当前第K名的产品
+    按词项由稀到常收集邻居, 最多MAX_NEIGHBORS个
+    """
+    terms = old_terms.union(*changed.values())
+    neighbor_limit = max(2, total * NEIGHBOR_MAX_DF_RATIO)
+    rare = {term: df for term, df in _document_frequencies(term_model, terms).items() if df <= neighbor_limit}
+    postings = defaultdict(list)
+    for term, thing_id in term_model.objects.filter(term__in=rare).values_list('term', 'thing_id'):
+        postings[term].append(thing_id)
+    neighbors = set()
+    for term in sorted(rare, key=rare.get):
+        neighbors.update(postings[term])
+        if len(neighbors) >= MAX_NEIGHBORS:
+            break
+    neighbors -= set(changed)
+    if not neighbors or not changed:
+        return set()
+
+    counts = _load_counts(term_model, neighbors | set(changed))
+    corpus = Corpus(counts, _document_frequencies(term_model, set().union(*counts.values())), total, {}, {})
+    # 列表不足K个或第K名是补足的产品时为0
+    kth = dict(related_model.objects.filter(thing_id__in=neighbors, rank=TOP_K - 1).values_list('thing_id', 'score'))
+    return {other for other in neighbors
+            if max(corpus.similarity(thing_id, other) for thing_id in changed) > kth.get(other, 0)}
+
+
+def refresh(thing_ids):
+    """
+    产品变化后更新其词项并重算受影响的产品, 返回重算的产品数
+    """
+    thing_model, related_model, term_model = _models()
+    thing_ids = set(thing_ids)
+    published = _published(thing_model)
+
+    # 更新变化产品的词项, 下架或删除的产品不再保留词项
+    old_terms = set(term_model.objects.filter(thing_id__in=thing_ids).values_list('term', flat=True))
+    changed = {row['id']: analyze(row) for row in published.filter(pk__in=thing_ids).values('id', *FIELD_WEIGHTS)}
+    with transaction.atomic():
+        term_model.objects.filter(thing_id__in=thing_ids).delete()
+        term_model.objects.bulk_create(_term_records(term_model, changed), batch_size=BATCH_SIZE)
+
+    total = published.count()
+    limit = max_df(total)
+
+    # 必须重算的产品: 自身、原列表中包含它的产品
+    affected = set(thing_ids)
+    affected.update(related_model.objects.filter(related_id__in=thing_ids).values_list('thing_id', flat=True))
+    affected.update(_closer_neighbors(term_model, related_model, changed, old_terms, total))
+
+    # 候选产品: 与受影响产品有共同有效词项的产品, 读取其全部词项以计算向量长度
+    counts = _load_counts(term_model, affected)
+    terms = set().union(*counts.values())
+    df = _document_frequencies(term_model, terms)
+    valid = [term for term in terms if 1 < df.get(term, 0) <= limit]
+    candidates = set(term_model.objects.filter(term__in=valid).values_list('thing_id', flat=True)) - set(counts)
+    counts.update(_load_counts(term_model, candidates))
+    df.update(_document_frequencies(term_model, set().union(*counts.values()) - terms))
+
+    # 补足用的同分类最新产品
+    categories = dict(published.filter(pk__in=affected).values_list('id', 'category_id'))
+    for thing_id in categories:
+        counts.setdefault(thing_id, {})
+    recent = {}
+    for category_id in set(categories.values()) - {None}:
+        recent[category_id] = list(published.filter(category_id=category_id).values_list('id', flat=True)[:TOP_K + 1])
+
+    corpus = Corpus(counts, df, total, categories, recent)
+    _write(corpus, list(affected), related_model)
+    return len(affected)
+
+
+def schedule_refresh(thing_id):
+    """延迟合并刷新"""
+    schedule_refresh_many([thing_id])
+
+
+def schedule_refresh_many(thing_ids):
+    """延迟合并刷新多个产品, 只加一次锁"""
+    global _timer
+    with _pending_lock:
+        _pending_ids.update(thing_ids)
+        if _timer is not None or not _pending_ids:
+            return
+        _timer = threading.Timer(REFRESH_DELAY, _run_scheduled)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _run_scheduled():
+    global _timer
+    with _pending_lock:
+        thing_ids = set(_pending_ids)
+        _pending_ids.clear()
+        _timer = None
+
+    try:
+        count = refresh(thing_ids)
+        logger.info(f"相关产品已刷新: {count}个产品")
+    except Exception as e:
+        logger.error(f"相关产品刷新失败: {str(e)}")
+    finally:
+        connections.close_all()
+
+
+def _on_thing_deleted(instance, **kwargs):
+    schedule_refresh(instance.pk)
+
+
+post_delete.connect(_on_thing_deleted, sender='myapp.Thing', dispatch_uid='related_thing_deleted')
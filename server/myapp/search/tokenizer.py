@@ -0,0 +1,42 @@
+"""
+搜索分词
+中日韩文字按相邻两字切分, 其他文字按单词切分, 统一转为小写
+文档额外索引中日韩单字, 使单字查询也能命中; 查询只在单字成段时使用单字
+"""
+import html
+import re
+import unicodedata
+
+# 词项最大长度, 与SearchPosting.term一致
+MAX_TERM_LENGTH = 64
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_CJK = '぀-ヿ㐀-䶿一-鿿가-힯豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[^\W_{_CJK}]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+
+def normalize(text):
+    """去除html标签, 全角转半角, 转小写"""
+    text = html.unescape(_TAG_RE.sub(' ', text))
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def tokenize(text, query=False):
+    """
+    返回词项列表(保留重复, 用于统计词频)
+    query: 是否为查询语句
+    """
+    if not text:
+        return []
+
+    terms = []
+    for run in _TOKEN_RE.findall(normalize(text)):
+        if _CJK_RE.match(run):
+            if len(run) == 1 or not query:
+                terms.extend(run)
+            if len(run) > 1:
+                terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run[:MAX_TERM_LENGTH])
+    return terms
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from myapp.cache import category_tree
+
 from myapp.models import Thing, Category, User, OpLog, ErrorLog, News, Case, Faq, Inquiry, Download, BasicSite, \
     BasicTdk, BasicBanner, BasicGlobal, BasicAdditional, Comment, About, Advantage
 
@@ -12,6 +14,7 @@ class ThingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Thing
         fields = '__all__'
+        read_only_fields = ('is_featured', 'is_recommended')
 
 
 class ListThingSerializer(serializers.ModelSerializer):
@@ -41,9 +44,19 @@ class UpdateThingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Thing
         fields = '__all__'
+        read_only_fields = ('is_featured', 'is_recommended')
         # 排除多对多字段
 
 
+class ImportThingSerializer(serializers.ModelSerializer):
+    """批量导入的字段校验, 分类由导入流程按名称解析"""
+
+    class Meta:
+        model = Thing
+        fields = ('title', 'summary', 'cover', 'description', 'price', 'dimension', 'seo_title',
+                  'seo_description', 'seo_keywords', 'properties', 'status')
+
+
 # 普通序列化
 class NormalCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -60,12 +73,8 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'pid', 'title', 'sort', 'cover', 'children']
 
     def get_children(self, obj):
-        # 获取当前类别的所有子类别，并根据 sort 排序
-        children = Category.objects.filter(pid=obj.id).order_by('sort', '-id')
-        # 如果有子类，继续序列化；如果没有则返回空数组
-        if children.exists():
-            return CategorySerializer(children, many=True).data
-        return []  # 如果没有子类则返回空数组
+        # 从进程内分类树取子孙分类(按 sort 排序)，没有子类则返回空数组
+        return category_tree.get_tree().serialize(obj.id)
 
 
 class NewsSerializer(serializers.ModelSerializer):
@@ -0,0 +1,290 @@
+"""
+站点地图生成
+逐行读取数据并写入文件, 不在内存中构造整棵XML树; 生成sitemap索引和编号的子sitemap,
+每个子sitemap最多SITEMAP_MAX_URLS条(协议上限50000), 同时生成.xml.gz文件
+
+子sitemap按id区间划分(id // SITEMAP_MAX_URLS), 删除数据不会使后续文件整体错位;
+每个子sitemap记录其内容签名, 重新生成时只重写签名变化的文件
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from myapp.cache.tags import TaggedCache, TAG_THING, TAG_CATEGORY, TAG_NEWS, TAG_CASE
+from myapp.models import Thing, Category, News, Case
+
+logger = logging.getLogger('myapp')
+
+# sitemap依赖的模型
+CACHE_TAGS = (TAG_THING, TAG_CATEGORY, TAG_NEWS, TAG_CASE)
+
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+LOCK_KEY = 'sitemap_lock'
+LOCK_TIMEOUT = 300
+WAIT_TIMEOUT = 10
+WAIT_INTERVAL = 0.2
+
+DEFAULT_MAX_URLS = 50000
+ITERATOR_CHUNK_SIZE = 2000
+
+XML_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# 静态页面 (路径, 优先级)
+STATIC_PAGES = (
+    ('/', 1.0),
+    ('/about', 0.9),
+    ('/contact', 0.9),
+    ('/product', 0.9),
+    ('/news', 0.9),
+    ('/case', 0.9),
+    ('/faq', 0.9),
+    ('/download', 0.9),
+)
+
+
+def get_sections():
+    """
+    动态页面分组 (名称, 查询集, 路径模板, 优先级)
+    """
+    return (
+        ('product', Thing.objects.filter(status='0'), '/product/{}', 0.9),
+        ('category', Category.objects.all(), '/product/category/{}', 0.8),
+        ('news', News.objects.filter(status='0'), '/news/{}', 0.9),
+        ('case', Case.objects.filter(status='0'), '/case/{}', 0.8),
+    )
+
+
+def get_root():
+    return getattr(settings, 'SITEMAP_ROOT', os.path.join(settings.BASE_DIR, 'cache', 'sitemap'))
+
+
+def get_max_urls():
+    return min(getattr(settings, 'SITEMAP_MAX_URLS', DEFAULT_MAX_URLS), DEFAULT_MAX_URLS)
+
+
+def file_path(name):
+    return os.path.join(get_root(), name)
+
+
+def load_manifest():
+    try:
+        with open(file_path(MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(manifest):
+    tmp = file_path(MANIFEST_NAME) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, file_path(MANIFEST_NAME))
+
+
+class _XMLWriter:
+    """
+    同时写入.xml和.xml.gz, 写完后原子替换
+    """
+
+    def __init__(self, name):
+        self.path = file_path(name)
+        self.plain = open(self.path + '.tmp', 'w', encoding='utf-8')
+        # mtime固定为0, 相同内容生成相同的压缩文件
+        self.compressed = gzip.GzipFile(self.path + '.gz.tmp', 'wb', compresslevel=6, mtime=0)
+
+    def write(self, text):
+        self.plain.write(text)
+        self.compressed.write(text.encode('utf-8'))
+
+    def close(self):
+        self.plain.close()
+        self.compressed.close()
+        os.replace(self.path + '.tmp', self.path)
+        os.replace(self.path + '.gz.tmp', self.path + '.gz')
+
+
+def _url_xml(loc, lastmod, priority, changefreq='weekly'):
+    lastmod_xml = f"<lastmod>{lastmod}</lastmod>" if lastmod else ''
+    return (f"<url><loc>{escape(loc)}</loc>{lastmod_xml}"
+            f"<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n")
+
+
+def _signature(base_url, rows):
+    digest = hashlib.sha1(base_url.encode('utf-8'))
+    for row in rows:
+        digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_child(name, base_url, pattern, priority, rows):
+    writer = _XMLWriter(name)
+    try:
+        writer.write(XML_HEADER)
+        writer.write(f'<urlset xmlns="{XMLNS}">\n')
+        for pk, lastmod in rows:
+            writer.write(_url_xml(f"{base_url}{pattern.format(pk)}", lastmod, priority))
+        writer.write('</urlset>\n')
+    finally:
+        writer.close()
+
+
+def _write_static(name, base_url):
+    writer = _XMLWriter(name)
+    try:
+        writer.write(XML_HEADER)
+        writer.write(f'<urlset xmlns="{XMLNS}">\n')
+        for path, priority in STATIC_PAGES:
+            writer.write(_url_xml(f"{base_url}{path}", None, priority))
+        writer.write('</urlset>\n')
+    finally:
+        writer.close()
+
+
+def _child_url(base_url, name):
+    return f"{base_url}/myapp/index/sitemap/child?name={name}"
+
+
+def _write_index(base_url, children):
+    writer = _XMLWriter(INDEX_NAME)
+    try:
+        writer.write(XML_HEADER)
+        writer.write(f'<sitemapindex xmlns="{XMLNS}">\n')
+        for name in sorted(children):
+            writer.write(f"<sitemap><loc>{escape(_child_url(base_url, name))}</loc>"
+                         f"<lastmod>{children[name]['lastmod']}</lastmod></sitemap>\n")
+        writer.write('</sitemapindex>\n')
+    finally:
+        writer.close()
+
+
+def _iter_chunks(queryset, max_urls):
+    """
+    按id区间逐块读取 (块编号, [(id, 日期)])
+    """
+    rows = []
+    current = None
+    for pk, create_time in queryset.order_by('id').values_list('id', 'create_time').iterator(
+            chunk_size=ITERATOR_CHUNK_SIZE):
+        chunk = pk // max_urls
+        if current is not None and chunk != current:
+            yield current, rows
+            rows = []
+        current = chunk
+        rows.append((pk, create_time.strftime('%Y-%m-%d') if create_time else None))
+    if rows:
+        yield current, rows
+
+
+def generate(full=False, versions=None):
+    """
+    生成sitemap, full为False时只重写内容变化的子sitemap
+    返回 (manifest, 重写的文件数)
+    """
+    os.makedirs(get_root(), exist_ok=True)
+    if versions is None:
+        versions = TaggedCache.tag_versions(CACHE_TAGS)
+    base_url = settings.BASE_HOST_URL.rstrip('/')
+    max_urls = get_max_urls()
+
+    old = load_manifest() or {}
+    old_files = old.get('files', {}) if not full else {}
+    today = timezone.now().strftime('%Y-%m-%d')
+    children = {}
+    written = 0
+
+    def keep_or_write(name, signature, count, write):
+        nonlocal written
+        previous = old_files.get(name)
+        if previous and previous['signature'] == signature and os.path.exists(file_path(name)):
+            children[name] = previous
+            return
+        write()
+        written += 1
+        children[name] = {'signature': signature, 'lastmod': today, 'count': count, 'mtime': int(time.time())}
+
+    static_name = 'sitemap-page-0.xml'
+    keep_or_write(static_name, _signature(base_url, STATIC_PAGES), len(STATIC_PAGES),
+                  lambda: _write_static(static_name, base_url))
+
+    for section, queryset, pattern, priority in get_sections():
+        for chunk, rows in _iter_chunks(queryset, max_urls):
+            name = f"sitemap-{section}-{chunk}.xml"
+            keep_or_write(name, _signature(base_url, rows), len(rows),
+                          lambda: _write_child(name, base_url, pattern, priority, rows))
+
+    # 已经没有数据的子sitemap
+    for name in set(old.get('files', {})) - set(children) - {INDEX_NAME}:
+        for path in (file_path(name), file_path(name) + '.gz'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    index_signature = _signature(base_url, sorted((name, item['signature']) for name, item in children.items()))
+    previous_index = old_files.get(INDEX_NAME)
+    if previous_index and previous_index['signature'] == index_signature and os.path.exists(file_path(INDEX_NAME)):
+        index_entry = previous_index
+    else:
+        _write_index(base_url, children)
+        written += 1
+        index_entry = {'signature': index_signature, 'lastmod': today, 'count': len(children),
+                       'mtime': int(time.time())}
+
+    manifest = {
+        'tags': versions,
+        'base_url': base_url,
+        'files': dict(children, **{INDEX_NAME: index_entry}),
+    }
+    _save_manifest(manifest)
+    logger.info(f"sitemap生成完成: {len(children)}个子sitemap, 重写{written}个文件")
+    return manifest, written
+
+
+def regenerate():
+    """
+    文件缺失时全量重新生成, 返回是否已重新生成; 其他进程正在生成时不重复生成
+    """
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return False
+    try:
+        generate(full=True)
+        return True
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def ensure_current():
+    """
+    返回当前的manifest, 依赖的数据变化后先增量重新生成
+    其他进程正在生成时返回已有文件, 没有已有文件时等待其完成
+    """
+    versions = TaggedCache.tag_versions(CACHE_TAGS)
+    manifest = load_manifest()
+    if manifest and manifest.get('tags') == versions \
+            and manifest.get('base_url') == settings.BASE_HOST_URL.rstrip('/'):
+        return manifest
+
+    if cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        try:
+            return generate(versions=versions)[0]
+        finally:
+            cache.delete(LOCK_KEY)
+
+    if manifest:
+        return manifest
+
+    deadline = time.time() + WAIT_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        manifest = load_manifest()
+        if manifest:
+            return manifest
+    raise TimeoutError('等待sitemap生成超时')
@@ -0,0 +1,108 @@
+"""
+后台概览计数
+今日询盘数、今日访客数以及产品/新闻/案例总数保存在b_dashboard_counter的一行中:
+模型新建/删除时增量更新, 访问日志每批写入后从访问量汇总更新今日访客数,
+读取时跨天或距上次对账超过DASHBOARD_RECONCILE_INTERVAL秒则按数据库重新统计;
+批量写入(bulk_create等)不发送信号, 之后应调用add_total()或reconcile()
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+ROW_ID = 1
+DEFAULT_RECONCILE_INTERVAL = 3600
+
+# 模型 -> 总数字段
+TOTAL_FIELDS = {
+    'myapp.Thing': 'product_count',
+    'myapp.News': 'news_count',
+    'myapp.Case': 'case_count',
+}
+
+
+def _model():
+    return apps.get_model('myapp', 'DashboardCounter')
+
+
+def reconcile():
+    """按数据库重新统计全部计数, 返回计数行"""
+    from myapp.stats import visits
+
+    today = timezone.now().date()
+    values = {
+        'day': today,
+        'inquiry_count': apps.get_model('myapp', 'Inquiry').objects.filter(create_time__date=today).count(),
+        'visit_count': visits.day_uv(today),
+        'reconcile_time': timezone.now(),
+    }
+    for label, field in TOTAL_FIELDS.items():
+        values[field] = apps.get_model(label).objects.count()
+    row, _ = _model().objects.update_or_create(pk=ROW_ID, defaults=values)
+    return row
+
+
+def get():
+    """返回计数行, 一次查询; 跨天或需要对账时先重新统计"""
+    row = _model().objects.filter(pk=ROW_ID).first()
+    interval = getattr(settings, 'DASHBOARD_RECONCILE_INTERVAL', DEFAULT_RECONCILE_INTERVAL)
+    now = timezone.now()
+    if row is None or row.day != now.date() or row.reconcile_time is None \
+            or (now - row.reconcile_time).total_seconds() >= interval:
+        row = reconcile()
+    return row
+
+
+def _adjust(field, delta, today_only=False):
+    rows = _model().objects.filter(pk=ROW_ID)
+    if today_only:
+        rows = rows.filter(day=timezone.now().date())
+    if not rows.update(**{field: F(field) + delta}):
+        # 计数行不存在或已跨天
+        reconcile()
+
+
+def add_total(label, delta):
+    """批量新建/删除后按条数更新总数, label如 'myapp.Thing'"""
+    if delta:
+        _adjust(TOTAL_FIELDS[label], delta)
+
+
+def refresh_visits():
+    """访问日志写入后更新今日访客数"""
+    from myapp.stats import visits
+
+    today = timezone.now().date()
+    _model().objects.filter(pk=ROW_ID, day=today).update(visit_count=visits.day_uv(today))
+
+
+def _on_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: _adjust(TOTAL_FIELDS[sender._meta.label], 1))
+
+
+def _on_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _adjust(TOTAL_FIELDS[sender._meta.label], -1))
+
+
+def _created_today(instance):
+    return instance.create_time is not None and instance.create_time.date() == timezone.now().date()
+
+
+def _on_inquiry_saved(instance, created, raw=False, **kwargs):
+    if created and not raw and _created_today(instance):
+        transaction.on_commit(lambda: _adjust('inquiry_count', 1, today_only=True))
+
+
+def _on_inquiry_deleted(instance, **kwargs):
+    if _created_today(instance):
+        transaction.on_commit(lambda: _adjust('inquiry_count', -1, today_only=True))
+
+
+for _label in TOTAL_FIELDS:
+    post_save.connect(_on_saved, sender=_label, dispatch_uid=f'dashboard_counter_saved_{_label}')
+    post_delete.connect(_on_deleted, sender=_label, dispatch_uid=f'dashboard_counter_deleted_{_label}')
+post_save.connect(_on_inquiry_saved, sender='myapp.Inquiry', dispatch_uid='dashboard_counter_inquiry_saved')
+post_delete.connect(_on_inquiry_deleted, sender='myapp.Inquiry', dispatch_uid='dashboard_counter_inquiry_deleted')
@@ -0,0 +1,112 @@
+"""
+访问量汇总 (PV/UV)
+访问日志每批写入后按小时和天合并进b_visit_rollup, 统计接口只读汇总表, 与日志量无关;
+UV保存HyperLogLog草图, 多天的UV由草图合并得到, 不重复计算同一访客
+"""
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+
+from myapp.models import OpLog, VisitRollup
+from myapp.stats.hll import HyperLogLog
+
+BATCH_SIZE = 2000
+
+
+def _buckets(rows):
+    """
+    rows: (访问时间, ip)
+    返回 {(period, 时段开始时间): [pv, 草图]}
+    """
+    groups = defaultdict(lambda: [0, HyperLogLog()])
+    for re_time, re_ip in rows:
+        if re_time is None:
+            continue
+        hour = re_time.replace(minute=0, second=0, microsecond=0)
+        for key in ((VisitRollup.PERIOD_HOUR, hour), (VisitRollup.PERIOD_DAY, hour.replace(hour=0))):
+            group = groups[key]
+            group[0] += 1
+            if re_ip:
+                group[1].add(re_ip)
+    return groups
+
+
+def _merge(groups, replace=False):
+    """把分组合并进汇总表, replace为True时覆盖原有数据"""
+    for (period, start), (pv, sketch) in groups.items():
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    row = VisitRollup.objects.select_for_update().filter(period=period, start=start).first()
+                    if row is None:
+                        VisitRollup.objects.create(period=period, start=start, pv=pv, uv=sketch.count(),
+                                                   uv_sketch=sketch.to_bytes())
+                    else:
+                        if not replace:
+                            sketch = HyperLogLog.from_bytes(row.uv_sketch).merge(sketch)
+                            pv += row.pv
+                        row.pv = pv
+                        row.uv = sketch.count()
+                        row.uv_sketch = sketch.to_bytes()
+                        row.save(update_fields=['pv', 'uv', 'uv_sketch'])
+                break
+            except IntegrityError:
+                # 其他进程同时创建了该时段, 重试一次即可合并
+                if attempt:
+                    raise
+
+
+def record(records):
+    """
+    访问日志写入后调用
+    records: OpLog字段dict
+    """
+    _merge(_buckets((record.get('re_time'), record.get('re_ip')) for record in records))
+
+
+def rebuild(since):
+    """
+    由访问日志重建since所在日期起的汇总, 返回处理的日志条数
+    用于初次部署和对账, 期间新写入的日志可能重复计入
+    """
+    since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = OpLog.objects.filter(re_time__gte=since).values_list('re_time', 're_ip')
+    groups = _buckets(rows.iterator(chunk_size=BATCH_SIZE))
+    total = sum(pv for (period, _), (pv, _) in groups.items() if period == VisitRollup.PERIOD_DAY)
+
+    with transaction.atomic():
+        VisitRollup.objects.filter(start__gte=since).delete()
+        _merge(groups, replace=True)
+    return total
+
+
+def daily(since):
+    """
+    since所在日期起每天的PV/UV, 以及整个范围合并后的UV
+    返回 ([{'day', 'pv', 'uv'}], 总UV)
+    """
+    rows = VisitRollup.objects.filter(period=VisitRollup.PERIOD_DAY,
+                                      start__gte=since.replace(hour=0, minute=0, second=0, microsecond=0)) \
+        .order_by('start')
+    result = []
+    sketches = []
+    for row in rows:
+        result.append({'day': row.start.date(), 'pv': row.pv, 'uv': row.uv})
+        sketches.append(HyperLogLog.from_bytes(row.uv_sketch))
+    return result, HyperLogLog.union(sketches).count()
+
+
+def hourly(since):
+    """since起每小时的PV/UV [{'hour', 'pv', 'uv'}]"""
+    rows = VisitRollup.objects.filter(period=VisitRollup.PERIOD_HOUR,
+                                      start__gte=since.replace(minute=0, second=0, microsecond=0)) \
+        .order_by('start').values_list('start', 'pv', 'uv')
+    return [{'hour': start, 'pv': pv, 'uv': uv} for start, pv, uv in rows]
+
+
+def day_uv(day):
+    """某天(date)的UV估算值"""
+    uv = VisitRollup.objects.filter(period=VisitRollup.PERIOD_DAY, start=datetime.combine(day, time.min)) \
+        .values_list('uv', flat=True).first()
+    return uv or 0
@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from myapp.cache.category_tree import CategoryTree
+
+
+def category(id, pid):
+    return {'id': id, 'pid': pid, 'title': str(id), 'sort': 0, 'cover': None}
+
+
+class CategoryTreeTest(SimpleTestCase):
+
+    def test_subtree_ids(self):
+        tree = CategoryTree([category(1, -1), category(2, 1), category(3, 2), category(4, -1)])
+        self.assertEqual(sorted(tree.subtree_ids(1)), [1, 2, 3])
+        self.assertEqual(tree.subtree_ids(4), [4])
+
+    def test_self_parent(self):
+        tree = CategoryTree([category(1, 1), category(2, 1)])
+        self.assertEqual(sorted(tree.subtree_ids(1)), [1, 2])
+        self.assertEqual([item['id'] for item in tree.serialize(1)], [2])
+
+    def test_two_node_cycle(self):
+        tree = CategoryTree([category(1, 2), category(2, 1), category(3, 2)])
+        self.assertEqual(sorted(tree.subtree_ids(1)), [1, 2, 3])
+        self.assertEqual(sorted(tree.subtree_ids(2)), [1, 2, 3])
+        data = tree.serialize(1)
+        self.assertEqual([item['id'] for item in data], [2])
+        self.assertEqual(sorted(item['id'] for item in data[0]['children']), [3])
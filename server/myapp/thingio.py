@@ -0,0 +1,213 @@
+"""
+产品批量导入导出 (CSV / NDJSON)
+导入: 流式解析, 按块校验, bulk_create/bulk_update写入, 分类按名称一次性解析,
+      全部写入后只重建导入产品的搜索索引, 相关产品在后台增量刷新, 并使缓存失效
+导出: 用iterator()逐行读取并输出, 不在内存中构建完整列表
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from myapp.cache import warmup
+from myapp.cache.tags import TaggedCache, TAG_THING, TAG_CATEGORY
+from myapp.models import Thing, Category
+from myapp.search import index as search_index, related as related_things
+from myapp.stats import counters
+from myapp.serializers import ImportThingSerializer
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_NDJSON: 'application/x-ndjson; charset=utf-8',
+}
+
+# 导出的列, category为分类名称
+EXPORT_FIELDS = ('id', 'title', 'category', 'summary', 'cover', 'description', 'price', 'dimension',
+                 'seo_title', 'seo_description', 'seo_keywords', 'properties', 'status', 'pv', 'create_time')
+
+CHUNK_SIZE = 500
+MAX_ERRORS = 100  # 返回的错误条数上限
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []  # [{'line': 行号, 'errors': 错误}]
+        self.thing_ids = []  # 新建和更新的产品id
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'updated': self.updated, 'failed': self.failed, 'errors': self.errors}
+
+
+def parse(stream, fmt):
+    """
+    逐行解析二进制流, 返回 (行号, 字段dict) 的生成器
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # 空单元格视为未提供, 更新时不覆盖原值
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}
+    elif fmt == FORMAT_NDJSON:
+        for line_num, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, ValueError(f"JSON格式错误: {e}")
+                continue
+            yield line_num, row if isinstance(row, dict) else ValueError('每行应为JSON对象')
+    else:
+        raise ValueError(f"不支持的格式: {fmt}")
+
+
+def _chunks(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _import_chunk(chunk, categories, result):
+    """校验并写入一块数据"""
+    prepared = []  # (行号, pk, 字段)
+    for line_num, row in chunk:
+        if isinstance(row, Exception):
+            result.add_error(line_num, str(row))
+            continue
+
+        data = {key: value for key, value in row.items() if key in ImportThingSerializer.Meta.fields}
+        pk = str(row.get('id') or '').strip()
+        category_title = str(row.get('category') or '').strip()
+        if category_title:
+            if category_title not in categories:
+                result.add_error(line_num, {'category': f"分类不存在: {category_title}"})
+                continue
+            data['category_id'] = categories[category_title]
+        prepared.append((line_num, int(pk) if pk.isdigit() else None, data))
+
+    serializer_data = [{k: v for k, v in data.items() if k != 'category_id'} for _, _, data in prepared]
+    serializer = ImportThingSerializer(data=serializer_data, many=True, partial=True)
+    if serializer.is_valid():
+        errors = [{}] * len(prepared)
+        validated_rows = serializer.validated_data
+    else:
+        # 块内有行校验失败时validated_data为空, 通过校验的行单独取校验结果
+        errors = serializer.errors
+        validated_rows = [None if error else serializer.child.run_validation(item)
+                          for error, item in zip(errors, serializer_data)]
+
+    existing = Thing.objects.in_bulk([pk for _, pk, _ in prepared if pk is not None])
+    to_create = []
+    to_update = []
+    update_fields = set()
+    for (line_num, pk, data), error, validated in zip(prepared, errors, validated_rows):
+        if error:
+            result.add_error(line_num, error)
+            continue
+        validated = dict(validated)
+        if 'category_id' in data:
+            validated['category_id'] = data['category_id']
+
+        if pk in existing:
+            thing = existing[pk]
+            for key, value in validated.items():
+                setattr(thing, key, value)
+            update_fields.update(validated)
+            to_update.append(thing)
+        else:
+            thing = Thing(**validated)
+            to_create.append(thing)
+        thing.sync_flags()
+
+    if update_fields & {'dimension'}:
+        update_fields.update(Thing.DIMENSION_FLAGS.values())
+    with transaction.atomic():
+        if to_create:
+            # MySQL的bulk_create不返回主键, 按写入前的最大id查回新建的产品
+            last_id = Thing.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            Thing.objects.bulk_create(to_create, batch_size=CHUNK_SIZE)
+            result.thing_ids.extend(Thing.objects.filter(pk__gt=last_id).values_list('pk', flat=True))
+        if to_update and update_fields:
+            Thing.objects.bulk_update(to_update, sorted(update_fields), batch_size=CHUNK_SIZE)
+            result.thing_ids.extend(thing.pk for thing in to_update)
+    result.created += len(to_create)
+    result.updated += len(to_update)
+
+
+def import_things(stream, fmt, chunk_size=CHUNK_SIZE):
+    """
+    导入产品, 有id且已存在的行更新, 其余新建
+    返回ImportResult
+    """
+    categories = dict(Category.objects.values_list('title', 'id'))
+    result = ImportResult()
+    for chunk in _chunks(parse(stream, fmt), chunk_size):
+        _import_chunk(chunk, categories, result)
+
+    if result.created or result.updated:
+        finish_import(result)
+    return result
+
+
+def finish_import(result):
+    """
+    批量写入不会调用Thing.save(): 只重建导入产品的搜索索引, 相关产品交给后台延迟刷新,
+    产品总数按新建条数更新, 然后使缓存失效; 耗时与导入条数成正比, 与产品总数无关
+    """
+    for chunk in _chunks(result.thing_ids, CHUNK_SIZE):
+        search_index.index_things(Thing.objects.filter(pk__in=chunk).only('id', *search_index.FIELD_WEIGHTS))
+    related_things.schedule_refresh_many(result.thing_ids)
+    counters.add_total('myapp.Thing', result.created)
+    TaggedCache.invalidate(TAG_THING, TAG_CATEGORY)
+    warmup.schedule((TAG_THING, TAG_CATEGORY))
+
+
+def _export_rows(queryset):
+    for thing in queryset.select_related('category').iterator(chunk_size=CHUNK_SIZE):
+        row = {field: getattr(thing, field) for field in EXPORT_FIELDS if field not in ('category', 'create_time')}
+        row['category'] = thing.category.title if thing.category else ''
+        row['create_time'] = thing.create_time.strftime('%Y-%m-%d %H:%M:%S') if thing.create_time else ''
+        yield row
+
+
+def export_things(queryset, fmt):
+    """
+    逐行导出, 返回字符串块的生成器
+    """
+    if fmt == FORMAT_NDJSON:
+        for row in _export_rows(queryset):
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+    if fmt != FORMAT_CSV:
+        raise ValueError(f"不支持的格式: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in _export_rows(queryset):
+        writer.writerow({key: '' if value is None else value for key, value in row.items()})
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
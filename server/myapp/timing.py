@@ -0,0 +1,91 @@
+"""
+请求计时
+OpLogs中间件为每个请求创建RequestTiming并挂在request.timing上, 计时数据随请求对象走, 多线程下互不干扰;
+中间件记录 middleware(进入视图前) / view / render 阶段, 视图内可用 phase(request, 名称) 记录自定义阶段:
+
+    with timing.phase(request, 'serialization'):
+        data = serializer.data
+
+请求结束时发送request_timed信号, 日志、指标等在信号接收方中处理
+计时只在请求线程中记录: 后台线程(如SectionCache异步刷新)中调用phase()不做任何事
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.dispatch import Signal
+
+# 参数 request, timing
+request_timed = Signal()
+
+
+class RequestTiming:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end = None
+        self.phases = {}  # 阶段名称 -> 毫秒, 同名阶段累加
+        self._open = {}  # 已开始未结束的阶段 -> 开始时间
+        self.thread_id = threading.get_ident()  # 创建计时的请求线程
+
+    def begin(self, name):
+        self._open[name] = time.perf_counter()
+
+    def finish(self, name):
+        started = self._open.pop(name, None)
+        if started is not None:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name, ms):
+        self.phases[name] = self.phases.get(name, 0) + ms
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield self
+        finally:
+            self.finish(name)
+
+    def stop(self):
+        """结束计时, 未结束的阶段计到此刻"""
+        if self.end is None:
+            for name in list(self._open):
+                self.finish(name)
+            self.end = time.perf_counter()
+        return self.total_ms
+
+    @property
+    def active(self):
+        """计时未结束且在请求线程中"""
+        return self.end is None and threading.get_ident() == self.thread_id
+
+    @property
+    def total_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def as_dict(self):
+        return {'total': round(self.total_ms, 1), **{name: round(ms, 1) for name, ms in self.phases.items()}}
+
+    def server_timing(self):
+        """Server-Timing响应头的值"""
+        items = [f"{name};dur={ms:.1f}" for name, ms in self.phases.items()]
+        items.append(f"total;dur={self.total_ms:.1f}")
+        return ', '.join(items)
+
+
+def get(request):
+    """返回请求的RequestTiming, 没有经过OpLogs中间件时为None; 也接受DRF的Request"""
+    return getattr(request, 'timing', None)
+
+
+@contextmanager
+def phase(request, name):
+    """记录视图中的一个阶段, 请求没有计时上下文、计时已结束或不在请求线程中时不做任何事"""
+    timing = get(request)
+    if timing is None or not timing.active:
+        yield None
+        return
+    with timing.phase(name):
+        yield timing
@@ -13,23 +13,31 @@ urlpatterns = [
     path('admin/captcha/key', get_captcha_key),
     path('admin/overview/count', views.admin.overview.count),
     path('admin/overview/dataCount', views.admin.overview.dataCount),
+    path('admin/overview/cacheStats', views.admin.overview.cacheStats),
+    path('admin/overview/opLogStats', views.admin.overview.opLogStats),
     path('admin/thing/list', views.admin.thing.list_api),
     path('admin/thing/detail', views.admin.thing.detail),
     path('admin/thing/create', views.admin.thing.create),
     path('admin/thing/update', views.admin.thing.update),
+    path('admin/thing/batchUpdate', views.admin.thing.batch_update),
     path('admin/thing/delete', views.admin.thing.delete),
+    path('admin/thing/import', views.admin.thing.import_api),
+    path('admin/thing/export', views.admin.thing.export_api),
     path('admin/news/list', views.admin.news.list_api),
     path('admin/news/create', views.admin.news.create),
     path('admin/news/delete', views.admin.news.delete),
     path('admin/news/update', views.admin.news.update),
+    path('admin/news/batchUpdate', views.admin.news.batch_update),
     path('admin/case/list', views.admin.case.list_api),
     path('admin/case/create', views.admin.case.create),
     path('admin/case/delete', views.admin.case.delete),
     path('admin/case/update', views.admin.case.update),
+    path('admin/case/batchUpdate', views.admin.case.batch_update),
     path('admin/faq/list', views.admin.faq.list_api),
     path('admin/faq/create', views.admin.faq.create),
     path('admin/faq/delete', views.admin.faq.delete),
     path('admin/faq/update', views.admin.faq.update),
+    path('admin/faq/batchUpdate', views.admin.faq.batch_update),
     path('admin/comment/list', views.admin.comment.list_api),
     path('admin/comment/create', views.admin.comment.create),
     path('admin/comment/delete', views.admin.comment.delete),
@@ -42,6 +50,7 @@ urlpatterns = [
     path('admin/download/create', views.admin.download.create),
     path('admin/download/delete', views.admin.download.delete),
     path('admin/download/update', views.admin.download.update),
+    path('admin/download/batchUpdate', views.admin.download.batch_update),
     path('admin/inquiry/list', views.admin.inquiry.list_api),
     path('admin/inquiry/create', views.admin.inquiry.create),
     path('admin/inquiry/delete', views.admin.inquiry.delete),
@@ -115,4 +124,5 @@ urlpatterns = [
     path('index/news/detail', views.index.news.detail),
     path('index/home/section', views.index.home.section),
     path('index/sitemap/section', views.index.sitemap.section),
+    path('index/sitemap/child', views.index.sitemap.child),
 ]
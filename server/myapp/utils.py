@@ -8,8 +8,8 @@ from email.mime.text import MIMEText
 from functools import wraps
 from smtplib import SMTP_SSL
 
-from django.core.cache import cache
-
+from myapp.cache import warmup
+from myapp.cache.tags import TaggedCache, ALL_TAGS
 from myapp.serializers import ErrorLogSerializer
 
 
@@ -94,9 +94,13 @@ def log_error(request, content):
 
 
 def clear_cache(request, response):
+    """
+    使全部内容缓存失效
+    只更新标签版本号, 不会清除验证码、2FA、限流计数等安全数据
+    """
     try:
-        # 清除所有缓存
-        cache.clear()
+        TaggedCache.invalidate(*ALL_TAGS)
+        warmup.schedule(ALL_TAGS)
         print("缓存清空----success")
         return True
     except Exception as e:
@@ -105,6 +109,29 @@ def clear_cache(request, response):
         return False, error_message
 
 
+def clear_cache_tags(*tags):
+    """
+    生成after_call使用的缓存失效函数, 写入成功后只使tags对应的缓存失效
+    用法: @after_call(clear_cache_tags(TAG_THING))
+    """
+
+    def _clear_cache_tags(request, response):
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict) and data.get('code') != 0:
+            # 写入失败, 无需失效
+            return False
+        try:
+            TaggedCache.invalidate(*tags)
+            warmup.schedule(tags)
+            return True
+        except Exception as e:
+            error_message = f"清除缓存时发生错误: {str(e)}"
+            return False, error_message
+
+    _clear_cache_tags.__name__ = f"clear_cache_tags({', '.join(tags)})"
+    return _clear_cache_tags
+
+
 def after_call(*after_funcs):
     """
     用作装饰器，在视图执行后依次执行所有 after_func(request, response)
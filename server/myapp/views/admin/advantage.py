@@ -4,11 +4,12 @@ from rest_framework.decorators import api_view, authentication_classes
 from rest_framework.pagination import PageNumberPagination
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache.tags import TAG_ADVANTAGE
 from myapp.handler import APIResponse
 from myapp.models import Advantage
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import AdvantageSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
 class MyPageNumberPagination(PageNumberPagination):
@@ -36,7 +37,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_ADVANTAGE))
 def create(request):
 
     data = request.data.copy()
@@ -53,7 +54,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_ADVANTAGE))
 def update(request):
 
     try:
@@ -75,7 +76,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_ADVANTAGE))
 def delete(request):
 
     try:
@@ -4,11 +4,12 @@ from rest_framework.decorators import api_view, authentication_classes, permissi
 from rest_framework.permissions import AllowAny
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache.tags import TAG_SITE_CONFIG
 from myapp.handler import APIResponse
 from myapp.models import BasicGlobal
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import BasicGlobalSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
 @api_view(['GET'])
@@ -34,7 +35,7 @@ def list_info(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_SITE_CONFIG))
 def update(request):
     try:
         basicGlobal = BasicGlobal.get_solo()
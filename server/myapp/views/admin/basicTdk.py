@@ -3,11 +3,12 @@
 from rest_framework.decorators import api_view, authentication_classes
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache.tags import TAG_SITE_CONFIG
 from myapp.handler import APIResponse
 from myapp.models import BasicTdk
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import BasicTdkSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
 @api_view(['GET'])
@@ -25,7 +26,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_SITE_CONFIG))
 def update(request):
 
     try:
@@ -6,29 +6,30 @@ from django.db.models import Q
 from rest_framework.decorators import api_view, authentication_classes
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache import category_tree
+from myapp.cache.tags import TAG_CATEGORY, TAG_THING
 from myapp.handler import APIResponse
 from myapp.models import Category
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
+from myapp.querybudget import query_budget
 from myapp.serializers import CategorySerializer
-from myapp.utils import dict_fetchall, after_call, clear_cache
+from myapp.utils import dict_fetchall, after_call, clear_cache_tags
 
 
+@query_budget(3)
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
     if request.method == 'GET':
-        # 获取所有顶级分类，并根据 sort 排序
-        top_level_categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
-
-        # 序列化顶级分类
-        serializer = CategorySerializer(top_level_categories, many=True)
-        return APIResponse(code=0, msg='查询成功', data=serializer.data)
+        # 顶级分类及其子分类，按 sort 排序
+        data = category_tree.get_tree().serialize()
+        return APIResponse(code=0, msg='查询成功', data=data)
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_CATEGORY, TAG_THING))
 def create(request):
 
     print('data-----', request.data)
@@ -48,7 +49,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_CATEGORY, TAG_THING))
 def update(request):
 
     try:
@@ -68,7 +69,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_CATEGORY, TAG_THING))
 def delete(request):
 
     try:
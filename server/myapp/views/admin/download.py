@@ -1,30 +1,41 @@
 # Create your views here.
 
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
+from myapp import batchupdate
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache import counts
+from myapp.cache.tags import TAG_DOWNLOAD
 from myapp.handler import APIResponse
 from myapp.models import Download
+from myapp.pagination import CountedPageNumberPagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
+from myapp.querybudget import query_budget
 from myapp.serializers import DownloadSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(CountedPageNumberPagination):
     page_size = 10  # 每页的默认项
     page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
     max_page_size = 100  # 最大页尺寸
 
 
+# 允许批量修改的字段
+BATCH_FIELDS = ('status',)
+PatchSerializer = batchupdate.patch_serializer(Download, BATCH_FIELDS)
+
+
+@query_budget(4)
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
     if request.method == 'GET':
         download = Download.objects.order_by('-create_time')
-        total = download.count()
+        total = counts.cached_count(download, (TAG_DOWNLOAD,))
 
         paginator = MyPageNumberPagination()
+        paginator.total = total
         paginated_download = paginator.paginate_queryset(download, request)
         serializer = DownloadSerializer(paginated_download, many=True)
         return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
@@ -33,7 +44,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_DOWNLOAD))
 def create(request):
 
     data = request.data.copy()
@@ -50,7 +61,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_DOWNLOAD))
 def update(request):
 
     try:
@@ -72,7 +83,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_DOWNLOAD))
 def delete(request):
 
     try:
@@ -83,3 +94,19 @@ def delete(request):
         return APIResponse(code=1, msg='对象不存在')
 
     return APIResponse(code=0, msg='删除成功')
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+@after_call(clear_cache_tags(TAG_DOWNLOAD))
+def batch_update(request):
+    """
+    批量修改状态
+    """
+    ids, values, error = batchupdate.parse_patch(request, PatchSerializer, BATCH_FIELDS)
+    if error:
+        return error
+
+    updated = Download.objects.filter(id__in=ids).update(**values)
+    return APIResponse(code=0, msg='更新成功', data={'updated': updated})
@@ -1,6 +1,7 @@
 # Create your views here.
 from rest_framework.decorators import api_view
 
+from myapp import logstore
 from myapp.handler import APIResponse
 from myapp.models import ErrorLog
 from myapp.serializers import ErrorLogSerializer
@@ -17,5 +18,6 @@ def list_api(request):
 @api_view(['POST'])
 def clear(request):
     if request.method == 'POST':
-        ErrorLog.objects.all().delete()
+        # 整表清空, 不逐行删除
+        logstore.clear(ErrorLog)
         return APIResponse(code=0, msg='操作成功')
@@ -4,11 +4,13 @@ from rest_framework.decorators import api_view, authentication_classes
 from rest_framework.pagination import PageNumberPagination
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache.tags import TAG_INQUIRY
 from myapp.handler import APIResponse
 from myapp.models import Inquiry
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
+from myapp.querybudget import query_budget
 from myapp.serializers import InquirySerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
 class MyPageNumberPagination(PageNumberPagination):
@@ -17,6 +19,7 @@ class MyPageNumberPagination(PageNumberPagination):
     max_page_size = 100  # 最大页尺寸
 
 
+@query_budget(4)
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
@@ -35,7 +38,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_INQUIRY))
 def create(request):
 
     data = request.data.copy()
@@ -52,7 +55,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_INQUIRY))
 def update(request):
 
     try:
@@ -74,7 +77,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_INQUIRY))
 def delete(request):
 
     try:
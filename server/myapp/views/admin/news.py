@@ -1,22 +1,32 @@
 # Create your views here.
 
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
+from myapp import batchupdate
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache import counts
+from myapp.cache.tags import TAG_NEWS
 from myapp.handler import APIResponse
 from myapp.models import News
+from myapp.pagination import CountedPageNumberPagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
+from myapp.querybudget import query_budget
 from myapp.serializers import NewsSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(CountedPageNumberPagination):
     page_size = 10  # 每页的默认项
     page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
     max_page_size = 100  # 最大页尺寸
 
 
+# 允许批量修改的字段
+BATCH_FIELDS = ('status',)
+PatchSerializer = batchupdate.patch_serializer(News, BATCH_FIELDS)
+
+
+@query_budget(4)
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
@@ -25,9 +35,10 @@ def list_api(request):
         news = News.objects.filter(title__contains=keyword).order_by('-create_time')
 
         # 分页
+        total = counts.cached_count(news, (TAG_NEWS,))
         paginator = MyPageNumberPagination()
+        paginator.total = total
         paginated_news = paginator.paginate_queryset(news, request)
-        total = news.count()
 
         serializer = NewsSerializer(paginated_news, many=True)
         return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
@@ -36,7 +47,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_NEWS))
 def create(request):
 
     if not request.data.get('title', None):
@@ -56,7 +67,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_NEWS))
 def update(request):
 
     try:
@@ -78,7 +89,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_NEWS))
 def delete(request):
 
     try:
@@ -89,3 +100,19 @@ def delete(request):
         return APIResponse(code=1, msg='对象不存在')
 
     return APIResponse(code=0, msg='删除成功')
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+@after_call(clear_cache_tags(TAG_NEWS))
+def batch_update(request):
+    """
+    批量修改状态
+    """
+    ids, values, error = batchupdate.parse_patch(request, PatchSerializer, BATCH_FIELDS)
+    if error:
+        return error
+
+    updated = News.objects.filter(id__in=ids).update(**values)
+    return APIResponse(code=0, msg='更新成功', data={'updated': updated})
@@ -1,7 +1,11 @@
 # Create your views here.
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes
 from rest_framework.pagination import PageNumberPagination
 
+from myapp import logstore
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import OpLog
@@ -21,6 +25,13 @@ def list_api(request):
         if request.method == 'GET':
             opLog = OpLog.objects.order_by('-re_time')
 
+            # 只查询最近days天, 日志表按月分区时只扫描相关分区
+            days = request.GET.get('days')
+            if days:
+                if not days.isdigit() or int(days) <= 0:
+                    return APIResponse(code=1, msg='days应为正整数')
+                opLog = opLog.filter(re_time__gte=timezone.now() - timedelta(days=int(days)))
+
             # 分页
             paginator = MyPageNumberPagination()
             paginated_logs = paginator.paginate_queryset(opLog, request)
@@ -36,7 +47,8 @@ def list_api(request):
 def deleteAll(request):
 
     if request.method == 'POST':
-        OpLog.objects.all().delete()
+        # 整表清空, 不逐行删除
+        logstore.clear(OpLog)
         return APIResponse(code=0, msg='操作成功')
 
 
@@ -1,13 +1,14 @@
 # Create your views here.
 from datetime import timedelta
 
-from django.db.models import Count
 from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes
 
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache.section import SectionCache
 from myapp.handler import APIResponse
-from myapp.models import OpLog, Inquiry, Thing, News, Case
+from myapp.logwriter import oplog_writer
+from myapp.stats import counters, visits
 
 
 @api_view(['GET'])
@@ -19,22 +20,18 @@ def count(request):
         # 计算day之前的时间
         days_ago = timezone.now() - timedelta(days=int(days))
 
-        # 使用 Django ORM 查询
-        results = (
-            OpLog.objects.filter(re_time__gte=days_ago)
-            .extra({'day': 'DATE(re_time)'})  # 使用 extra() 将日期提取为 'day'
-            .values('day')  # 提取日期
-            .annotate(pv=Count('id'), uv=Count('re_ip', distinct=True))  # 统计总 PV 和唯一 UV
-            .order_by('day')  # 按日期排序
-        )
-
-        results_dict = [
-            dict(day=row['day'], pv=row['pv'], uv=row['uv']) for row in
-            results]
+        # 读取按天汇总的访问量, 不扫描访问日志
+        visit_data, uv_total = visits.daily(days_ago)
 
         data = {
-            'visit_data': results_dict
+            'visit_data': visit_data,
+            'uv_total': uv_total,
         }
+
+        # 可选: 最近hours小时的逐小时访问量
+        hours = request.GET.get('hours')
+        if hours:
+            data['hour_data'] = visits.hourly(timezone.now() - timedelta(hours=int(hours)))
         return APIResponse(code=0, msg='查询成功', data=data)
 
 
@@ -42,28 +39,33 @@ def count(request):
 @authentication_classes([AdminTokenAuthtication])
 def dataCount(request):
     if request.method == 'GET':
-        today = timezone.now().date()
-
-        # 使用 annotate 和 aggregate 一次性获取所有统计数据
-        inquiry_count = Inquiry.objects.filter(create_time__date=today).count()
-        visit_count = (
-            OpLog.objects.filter(re_time__date=today)
-            .values('re_ip')
-            .distinct()
-            .count()
-        )
-
-        # 使用 aggregate 获取其他统计值
-        total_counts = Thing.objects.aggregate(product_count=Count('id'))  # Things 的产品数
-        news_counts = News.objects.aggregate(news_count=Count('id'))  # 新闻数
-        case_counts = Case.objects.aggregate(case_count=Count('id'))  # 案例数
+        # 计数随数据写入增量更新, 一次查询读取
+        counter = counters.get()
 
         data = {
-            'inquiry_count': inquiry_count,
-            'visit_count': visit_count,
-            'product_count': total_counts['product_count'],
-            'news_count': news_counts['news_count'],
-            'case_count': case_counts['case_count'],
+            'inquiry_count': counter.inquiry_count,
+            'visit_count': counter.visit_count,
+            'product_count': counter.product_count,
+            'news_count': counter.news_count,
+            'case_count': counter.case_count,
         }
 
         return APIResponse(code=0, msg='查询成功', data=data)
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+def cacheStats(request):
+    if request.method == 'GET':
+        # 前台页面缓存命中统计 hit/stale/miss
+        data = SectionCache.stats()
+        return APIResponse(code=0, msg='查询成功', data=data)
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+def opLogStats(request):
+    if request.method == 'GET':
+        # 访问日志写入队列, 所有进程汇总: 接收/排队/已写入/丢弃/写入失败条数
+        data = oplog_writer.stats()
+        return APIResponse(code=0, msg='查询成功', data=data)
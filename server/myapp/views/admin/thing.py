@@ -1,23 +1,34 @@
 # Create your views here.
 
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
-from myapp import utils
+from myapp import batchupdate, thingio, utils
 from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.cache import counts
+from myapp.cache.tags import TAG_THING
 from myapp.handler import APIResponse
 from myapp.models import Category, Thing
+from myapp.pagination import CountedPageNumberPagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
+from myapp.querybudget import query_budget
+from myapp.search import index as search_index, related as related_things
 from myapp.serializers import ThingSerializer, UpdateThingSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, clear_cache_tags
 
 
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(CountedPageNumberPagination):
     page_size = 10  # 每页的默认项
     page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
     max_page_size = 100  # 最大页尺寸
 
 
+# 允许批量修改的字段
+BATCH_FIELDS = ('status', 'category', 'dimension')
+PatchSerializer = batchupdate.patch_serializer(Thing, BATCH_FIELDS)
+
+
+@query_budget(5)
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
@@ -25,17 +36,21 @@ def list_api(request):
         keyword = request.GET.get("keyword", None)
         c = request.GET.get("c", None)
         if keyword:
-            things = Thing.objects.filter(title__contains=keyword).order_by('-create_time')
-        elif c:
-            category = Category.objects.get(pk=c)
-            things = category.category_thing.all()
+            things = search_index.results(Thing.objects.select_related('category'), keyword)
+            total = things.count()
         else:
-            things = Thing.objects.all().order_by('-create_time')
+            if c:
+                category = Category.objects.get(pk=c)
+                things = category.category_thing.all()
+            else:
+                things = Thing.objects.all().order_by('-create_time')
+            total = counts.cached_count(things, (TAG_THING,))
+            things = things.select_related('category')
 
         # 分页
         paginator = MyPageNumberPagination()
+        paginator.total = total
         paginated_things = paginator.paginate_queryset(things, request)
-        total = things.count()
 
         serializer = ThingSerializer(paginated_things, many=True)
         return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
@@ -59,7 +74,7 @@ def detail(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_THING))
 def create(request):
 
     serializer = ThingSerializer(data=request.data)
@@ -76,7 +91,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_THING))
 def update(request):
 
     try:
@@ -99,7 +114,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(clear_cache_tags(TAG_THING))
 def delete(request):
 
     try:
@@ -109,3 +124,62 @@ def delete(request):
     except Thing.DoesNotExist:
         return APIResponse(code=1, msg='对象不存在')
     return APIResponse(code=0, msg='删除成功')
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+def import_api(request):
+    """
+    批量导入产品, 上传字段file, format为csv或ndjson(默认按文件扩展名)
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return APIResponse(code=1, msg='缺少文件')
+
+    fmt = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+    if fmt not in thingio.FORMATS:
+        return APIResponse(code=1, msg='仅支持csv或ndjson格式')
+
+    result = thingio.import_things(upload.file, fmt)
+    return APIResponse(code=0, msg='导入完成', data=result.as_dict())
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+def export_api(request):
+    """
+    流式导出全部产品, format为csv(默认)或ndjson
+    """
+    fmt = request.GET.get('format', thingio.FORMAT_CSV)
+    if fmt not in thingio.FORMATS:
+        return APIResponse(code=1, msg='仅支持csv或ndjson格式')
+
+    things = Thing.objects.order_by('id')
+    response = StreamingHttpResponse(thingio.export_things(things, fmt), content_type=thingio.CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="things.{fmt}"'
+    return response
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+@after_call(clear_cache_tags(TAG_THING))
+def batch_update(request):
+    """
+    批量修改状态、分类、维度
+    """
+    ids, values, error = batchupdate.parse_patch(request, PatchSerializer, BATCH_FIELDS)
+    if error:
+        return error
+
+    if 'dimension' in values:
+        # 批量UPDATE不会调用save(), 在此同步标记字段
+        flags = Thing(dimension=values['dimension'])
+        flags.sync_flags()
+        values.update({field: getattr(flags, field) for field in Thing.DIMENSION_FLAGS.values()})
+
+    updated = Thing.objects.filter(id__in=ids).update(**values)
+    if 'status' in values or 'category' in values:
+        related_things.schedule_refresh_many(ids)
+    return APIResponse(code=0, msg='更新成功', data={'updated': updated})
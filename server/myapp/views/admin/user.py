@@ -14,7 +14,7 @@ from myapp.handler import APIResponse
 from myapp.models import User
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import UserSerializer, NormalUserSerializer
-from myapp.utils import md5value, after_call, clear_cache
+from myapp.utils import md5value
 from myapp.password_utils import hash_password, verify_password, is_bcrypt_hash, validate_password_complexity
 from myapp.security.two_factor import TwoFactorAuthService
 from myapp.security.password_policy import PasswordPolicyService
@@ -301,7 +301,6 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
 def create(request):
     try:
         username = request.data.get('username')
@@ -343,7 +342,6 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
 def update(request):
     try:
         # 同时支持 FormData 和 JSON 格式的请求
@@ -395,7 +393,6 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
 def updatePwd(request):
     try:
         pk = request.data.get('id')
@@ -449,7 +446,6 @@ def updatePwd(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
 def delete(request):
     try:
         user_id = request.data.get('id')
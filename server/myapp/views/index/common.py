@@ -1,13 +1,17 @@
-from django.core.cache import cache
 from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 
+from myapp.cache import conditional
+from myapp.cache.tags import TaggedCache, TAG_SITE_CONFIG, TAG_CATEGORY
 from myapp.handler import APIResponse
 from myapp.models import BasicSite, Category, BasicGlobal
 from myapp.serializers import BasicGlobalSerializer, BasicSiteSerializer
 
+# 导航数据依赖的模型
+CACHE_TAGS = (TAG_SITE_CONFIG, TAG_CATEGORY)
+
 
 def create_nav_item(name, href, type="link", subItems=None):
     """
@@ -57,9 +61,21 @@ def section(request):
             print(f"Request received: {request.method} {request.path}")
             print(f"Request headers: {dict(request.headers)}")
             print(f"Request params: {dict(request.GET)}")
-            
+
+            # 导航数据与请求参数无关, 使用固定缓存键
+            cache_key = 'nav_data'
+            tag_versions = TaggedCache.tag_versions(CACHE_TAGS)
+            response = conditional.not_modified(request, cache_key, CACHE_TAGS, versions=tag_versions)
+            if response is not None:
+                return response
+
+            cached_data = TaggedCache.get(cache_key)
+            if cached_data:
+                response = APIResponse(code=0, msg='查询成功', data=cached_data)
+                return conditional.set_validators(response, cache_key, tag_versions)
+
             # 获取基本站点信息
-            basic_site = BasicSite.objects.first() or {}
+            basic_site = BasicSite.get_solo() or {}
             basic_site_data = {
                 "site_gaid": getattr(basic_site, 'site_gaid', ''),
                 "site_logo": getattr(basic_site, 'site_logo', ''),
@@ -67,7 +83,7 @@ def section(request):
             }
             
             # 获取全局设置信息
-            basic_global = BasicGlobal.objects.first() or {}
+            basic_global = BasicGlobal.get_solo() or {}
             basic_global_data = {
                 "global_facebook": getattr(basic_global, 'global_facebook', ''),
                 "global_twitter": getattr(basic_global, 'global_twitter', ''),
@@ -128,9 +144,11 @@ def section(request):
                 "contactData": basic_global_data
             }
             
+            TaggedCache.set(cache_key, data, 3600, CACHE_TAGS, versions=tag_versions)  # 缓存3600秒
+
             response = APIResponse(code=0, msg='查询成功', data=data)
             print(f"Response: {response.data}")
-            return response
+            return conditional.set_validators(response, cache_key, tag_versions)
     except Exception as e:
         print(f"Error in section view: {str(e)}")
         import traceback
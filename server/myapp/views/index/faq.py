@@ -1,38 +1,68 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 
-from myapp.handler import APIResponse
+from myapp import pagination
+from myapp.cache.section import SectionCache
+from myapp.cache.tags import TAG_SITE_CONFIG, TAG_FAQ
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, Faq, BasicTdk
+from myapp.querybudget import query_budget
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, FaqSerializer, \
     BasicSiteSerializer
 
+# 页面数据依赖的模型
+CACHE_TAGS = (TAG_SITE_CONFIG, TAG_FAQ)
 
+# 页面读取的参数及默认值, 缓存键只由这些参数组成; 默认返回全部数据, 不读取pageSize和cursor
+SECTION_PARAMS = {pagination.PAGING_QUERY_PARAM: 'page'}
+# paging=cursor时分页
+CURSOR_SECTION_PARAMS = {'pageSize': '9', **pagination.SECTION_PARAMS}
+
+
+def section_queryset():
+    """列表查询集, check_query_plans也用它检查执行计划"""
+    return Faq.objects.all().order_by('-create_time')
+
+
+def build_section(request):
+    """
+    生成页面数据
+    """
+    sectionData = {}
+
+    # seo数据
+    basicTdk = BasicTdk.get_solo()
+    sectionData['seoData'] = {
+        'seo_title': basicTdk.tdk_faq_title,
+        'seo_description': basicTdk.tdk_faq_description,
+        'seo_keywords': basicTdk.tdk_faq_keywords,
+    }
+
+    # siteName
+    basicSite = BasicSite.get_solo()
+    basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
+    sectionData['siteName'] = basicSiteSerializer.data['site_name']
+
+    # banner数据
+    basicBanner = BasicBanner.get_solo()
+    sectionData['bannerData'] = basicBanner.banner_faq
+
+    # faq列表
+    faqs = section_queryset()
+    if pagination.cursor_requested(request):
+        paginator = pagination.KeysetPagination()
+        faqs = paginator.paginate_queryset(faqs, request)
+        sectionData.update(paginator.get_links())
+    faqSerializer = FaqSerializer(faqs, many=True)
+    sectionData['faqData'] = faqSerializer.data
+
+    return sectionData
+
+
+@query_budget(6)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def section(request):
     if request.method == 'GET':
-        sectionData = {}
-
-        # seo数据
-        basicTdk = BasicTdk.get_solo()
-        sectionData['seoData'] = {
-            'seo_title': basicTdk.tdk_faq_title,
-            'seo_description': basicTdk.tdk_faq_description,
-            'seo_keywords': basicTdk.tdk_faq_keywords,
-        }
-
-        # siteName
-        basicSite = BasicSite.get_solo()
-        basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
-        sectionData['siteName'] = basicSiteSerializer.data['site_name']
-
-        # banner数据
-        basicBanner = BasicBanner.get_solo()
-        sectionData['bannerData'] = basicBanner.banner_faq
-
-        # faq列表
-        faqs = Faq.objects.all().order_by('-create_time')
-        faqSerializer = FaqSerializer(faqs, many=True)
-        sectionData['faqData'] = faqSerializer.data
-
-        return APIResponse(code=0, msg='查询成功', data=sectionData)
+        params = CURSOR_SECTION_PARAMS if pagination.cursor_requested(request) else SECTION_PARAMS
+        cache_key = SectionCache.make_key('faq', request, params)
+        return SectionCache.respond(request, 'faq', cache_key, lambda: build_section(request), CACHE_TAGS, 3600)
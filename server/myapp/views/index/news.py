@@ -1,91 +1,133 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
 
-from myapp import utils
+from myapp import utils, pagination
+from myapp.cache import counts, pageviews
+from myapp.cache.section import SectionCache
+from myapp.cache.tags import TAG_SITE_CONFIG, TAG_CATEGORY, TAG_THING, TAG_NEWS
 from myapp.handler import APIResponse
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, News, BasicTdk
+from myapp.querybudget import query_budget
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, \
     NormalCategorySerializer, NewsSerializer, NewsListSerializer, BasicSiteSerializer, ListThingSerializer
 
+# 页面数据依赖的模型
+CACHE_TAGS = (TAG_SITE_CONFIG, TAG_CATEGORY, TAG_THING, TAG_NEWS)
 
-class MyPageNumberPagination(PageNumberPagination):
+# 页面读取的参数及默认值, 缓存键只由这些参数组成
+SECTION_PARAMS = {'page': '1', 'pageSize': '9', **pagination.SECTION_PARAMS}
+DETAIL_PARAMS = {'id': ''}
+
+
+class MyPageNumberPagination(pagination.CountedPageNumberPagination):
     page_size = 9  # 每页的默认项
     page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
     max_page_size = 100  # 最大页尺寸
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def section(request):
-    if request.method == 'GET':
-        sectionData = {}
-
-        # seo数据
-        basicTdk = BasicTdk.get_solo()
-        sectionData['seoData'] = {
-            'seo_title': basicTdk.tdk_news_title,
-            'seo_description': basicTdk.tdk_news_description,
-            'seo_keywords': basicTdk.tdk_news_keywords,
-        }
-
-        # siteName
-        basicSite = BasicSite.get_solo()
-        basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
-        sectionData['siteName'] = basicSiteSerializer.data['site_name']
-
-        # banner数据
-        basicBanner = BasicBanner.get_solo()
-        sectionData['bannerData'] = basicBanner.banner_news
-
-        # 精选产品
-        featuredThings = Thing.objects.filter(status=0, dimension__icontains="Feature").order_by('-create_time')[:8]
-        thingSerializer = ListThingSerializer(featuredThings, many=True)
-        sectionData['featuredData'] = thingSerializer.data
-
-        # 分页列表
-        news = News.objects.all().order_by('-create_time')
+def section_queryset():
+    """列表查询集, check_query_plans也用它检查执行计划"""
+    return News.objects.all().order_by('-create_time')
+
+
+def build_section(request):
+    """
+    生成页面数据
+    """
+    sectionData = {}
+
+    # seo数据
+    basicTdk = BasicTdk.get_solo()
+    sectionData['seoData'] = {
+        'seo_title': basicTdk.tdk_news_title,
+        'seo_description': basicTdk.tdk_news_description,
+        'seo_keywords': basicTdk.tdk_news_keywords,
+    }
+
+    # siteName
+    basicSite = BasicSite.get_solo()
+    basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
+    sectionData['siteName'] = basicSiteSerializer.data['site_name']
+
+    # banner数据
+    basicBanner = BasicBanner.get_solo()
+    sectionData['bannerData'] = basicBanner.banner_news
+
+    # 精选产品
+    featuredThings = Thing.flagged(Thing.FLAG_FEATURED, 8)
+    thingSerializer = ListThingSerializer(featuredThings, many=True)
+    sectionData['featuredData'] = thingSerializer.data
+
+    # 分页列表
+    news = section_queryset()
+    total = counts.cached_count(news, (TAG_NEWS,))
+    if pagination.cursor_requested(request):
+        paginator = pagination.KeysetPagination(MyPageNumberPagination.page_size)
+        paginated_list = paginator.paginate_queryset(news, request)
+        sectionData.update(paginator.get_links())
+    else:
         paginator = MyPageNumberPagination()
+        paginator.total = total
         paginated_list = paginator.paginate_queryset(news, request)
-        total = news.count()
 
-        newsSerializer = NewsListSerializer(paginated_list, many=True)
-        sectionData['newsData'] = newsSerializer.data
-        sectionData['total'] = total
+    newsSerializer = NewsListSerializer(paginated_list, many=True)
+    sectionData['newsData'] = newsSerializer.data
+    sectionData['total'] = total
 
-        return APIResponse(code=0, msg='查询成功', data=sectionData)
+    return sectionData
 
 
+@query_budget(10)
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def detail(request):
+def section(request):
+    if request.method == 'GET':
+        cache_key = SectionCache.make_key('news', request, SECTION_PARAMS)
+        return SectionCache.respond(request, 'news', cache_key, lambda: build_section(request), CACHE_TAGS, 3600)
+
+
+def build_detail(pk):
+    """
+    生成详情数据, 对象不存在时抛出News.DoesNotExist
+    """
     data = {}
-    try:
-        pk = request.GET.get('id', -1)
-        news = News.objects.get(pk=pk)
-    except News.DoesNotExist:
-        utils.log_error(request, '对象不存在')
-        return APIResponse(code=1, msg='对象不存在')
+    news = News.objects.get(pk=pk)
+    serializer = NewsSerializer(news)
 
-    if request.method == 'GET':
-        serializer = NewsSerializer(news)
+    # siteName
+    basicSite = BasicSite.get_solo()
+    basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
+    data['siteName'] = basicSiteSerializer.data['site_name']
+
+    # 详情数据
+    data['detailData'] = serializer.data
 
-        # siteName
-        basicSite = BasicSite.get_solo()
-        basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
-        data['siteName'] = basicSiteSerializer.data['site_name']
+    # 推荐产品
+    things = Thing.flagged(Thing.FLAG_RECOMMENDED, 4)
+    thingSerializer = ThingSerializer(things, many=True)
+    data['recommendData'] = thingSerializer.data
 
-        # 详情数据
-        data['detailData'] = serializer.data
+    # 产品分类
+    categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
+    categorySerializer = NormalCategorySerializer(categories, many=True)
+    data['categoryData'] = categorySerializer.data
 
-        # 推荐产品
-        things = Thing.objects.filter(status=0, dimension__icontains="Recommend").order_by('-create_time')[:4]
-        thingSerializer = ThingSerializer(things, many=True)
-        data['recommendData'] = thingSerializer.data
+    return data
 
-        # 产品分类
-        categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
-        categorySerializer = NormalCategorySerializer(categories, many=True)
-        data['categoryData'] = categorySerializer.data
 
-        return APIResponse(code=0, msg='查询成功', data=data)
+@query_budget(8, sample=lambda: {'id': News.objects.values_list('id', flat=True).first()})
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def detail(request):
+    if request.method == 'GET':
+        pk = request.GET.get('id', -1)
+        cache_key = SectionCache.make_key('news_detail', request, DETAIL_PARAMS)
+        try:
+            response = SectionCache.respond(request, 'news_detail', cache_key, lambda: build_detail(pk), CACHE_TAGS, 3600)
+        except News.DoesNotExist:
+            utils.log_error(request, '对象不存在')
+            return APIResponse(code=1, msg='对象不存在')
+
+        # 浏览量先在进程内累加, 定时批量写入
+        pageviews.hit(News, pk)
+        return response
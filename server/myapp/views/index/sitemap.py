@@ -1,17 +1,21 @@
-from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.decorators import api_view, renderer_classes, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.renderers import BaseRenderer
-from django.utils import timezone
-from django.core.cache import cache
-from xml.etree.ElementTree import Element, SubElement, tostring
-from typing import List, Dict
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
 import logging
+import re
 
-from myapp.models import Thing, Category, News, Case
-from server.settings import BASE_HOST_URL
+from myapp import sitemaps
+from myapp.cache import conditional
+from myapp.sitemaps import CACHE_TAGS
 
 logger = logging.getLogger(__name__)
 
+gzip_re = re.compile(r'\bgzip\b')
+
 
 class XMLRenderer(BaseRenderer):
     media_type = 'text/xml'
@@ -22,111 +26,76 @@ class XMLRenderer(BaseRenderer):
         return data
 
 
-def create_url_element(urlset: Element, loc: str, lastmod: str = None, changefreq: str = 'weekly',
-                       priority: float = 0.5) -> None:
-    """
-    创建URL元素
-    
-    Args:
-        urlset: XML根元素
-        loc: 页面URL
-        lastmod: 最后修改时间
-        changefreq: 更新频率
-        priority: 优先级
-    """
-    url = SubElement(urlset, 'url')
-
-    # 添加loc
-    loc_elem = SubElement(url, 'loc')
-    loc_elem.text = loc
+def not_found():
+    return Response("<?xml version='1.0' encoding='UTF-8'?><error>sitemap不存在</error>", status=404)
 
-    # 添加lastmod
-    if lastmod:
-        lastmod_elem = SubElement(url, 'lastmod')
-        lastmod_elem.text = lastmod
-
-    # 添加changefreq
-    changefreq_elem = SubElement(url, 'changefreq')
-    changefreq_elem.text = changefreq
-
-    # 添加priority
-    priority_elem = SubElement(url, 'priority')
-    priority_elem.text = str(priority)
 
+def serve_file(request, name, regenerate=True):
+    """
+    返回预先生成的sitemap文件, 客户端支持gzip时返回.xml.gz
+    文件缺失时全量重新生成一次后再返回, 仍然缺失时返回404
+    """
+    try:
+        manifest = sitemaps.ensure_current()
+    except Exception as e:
+        logger.error(f"生成sitemap.xml时发生错误: {str(e)}")
+        return Response(
+            "<?xml version='1.0' encoding='UTF-8'?><error>生成sitemap时发生错误</error>",
+            status=500
+        )
 
-def get_static_pages() -> List[Dict]:
-    """获取静态页面配置"""
-    return [
-        {'loc': '/', 'priority': 1.0, 'changefreq': 'weekly'},
-        {'loc': '/about', 'priority': 0.9, 'changefreq': 'weekly'},
-        {'loc': '/contact', 'priority': 0.9, 'changefreq': 'weekly'},
-        {'loc': '/product', 'priority': 0.9, 'changefreq': 'weekly'},
-        {'loc': '/news', 'priority': 0.9, 'changefreq': 'weekly'},
-        {'loc': '/faq', 'priority': 0.9, 'changefreq': 'weekly'},
-    ]
+    # 只返回manifest中记录的文件
+    entry = manifest['files'].get(name)
+    if entry is None:
+        return not_found()
+
+    # gzip文件和原始文件是不同的表示, ETag不同
+    base_etag = f'"{entry["signature"]}"'
+    response, etag = conditional.conditional_response(request, base_etag, entry['mtime'])
+    if response is None:
+        path = sitemaps.file_path(name)
+        use_gzip = bool(gzip_re.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        try:
+            f = open(path + '.gz' if use_gzip else path, 'rb')
+        except FileNotFoundError:
+            # 文件被删除或与manifest不一致
+            logger.warning(f"sitemap文件缺失: {name}")
+            if regenerate:
+                try:
+                    if sitemaps.regenerate():
+                        return serve_file(request, name, regenerate=False)
+                except Exception as e:
+                    logger.error(f"重新生成sitemap时发生错误: {str(e)}")
+            return not_found()
+        response = FileResponse(f, content_type='application/xml; charset=utf-8')
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+            etag = conditional.gzip_etag(base_etag)
+        else:
+            etag = base_etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(entry['mtime'])
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 
 @api_view(['GET'])
+@permission_classes([AllowAny])
 @renderer_classes([XMLRenderer])
 def section(request):
     """
-    生成网站sitemap.xml
+    sitemap索引, 列出所有子sitemap
     """
-    try:
-        # 尝试从缓存获取
-        cache_key = 'sitemap_xml'
-        cached_xml = cache.get(cache_key)
-        if cached_xml:
-            return Response(cached_xml)
-
-        # 创建XML根元素
-        urlset = Element('urlset', xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
-        base_url = BASE_HOST_URL.rstrip('/')
-        current_date = timezone.now().strftime('%Y-%m-%d')
-
-        # 添加静态页面（去掉 lastmod）
-        for page in get_static_pages():
-            create_url_element(
-                urlset=urlset,
-                loc=f"{base_url}{page['loc']}",
-                lastmod=None,  # 设置为 None，这样 create_url_element 函数就不会添加 lastmod 字段
-                changefreq=page['changefreq'],
-                priority=page['priority']
-            )
-
-        # 添加产品页面
-        things = Thing.objects.select_related('category').filter(status='0')
-        for thing in things:
-            create_url_element(
-                urlset=urlset,
-                loc=f"{base_url}/product/{thing.id}",
-                lastmod=thing.create_time.strftime('%Y-%m-%d') if thing.create_time else current_date,
-                changefreq='weekly',
-                priority=0.9
-            )
-
-        # 添加新闻页面
-        news = News.objects.filter(status='0')
-        for item in news:
-            create_url_element(
-                urlset=urlset,
-                loc=f"{base_url}/news/{item.id}",
-                lastmod=item.create_time.strftime('%Y-%m-%d') if item.create_time else current_date,
-                changefreq='weekly',
-                priority=0.9
-            )
-
-        # 生成XML字符串
-        xml_str = tostring(urlset, encoding="utf-8", xml_declaration=True)
-
-        # 缓存XML结果（24小时）
-        cache.set(cache_key, xml_str, 86400)
-
-        return Response(xml_str)
+    return serve_file(request, sitemaps.INDEX_NAME)
 
-    except Exception as e:
-        logger.error(f"生成sitemap.xml时发生错误: {str(e)}")
-        return Response(
-            f"<?xml version='1.0' encoding='UTF-8'?><error>生成sitemap时发生错误</error>",
-            status=500
-        )
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@renderer_classes([XMLRenderer])
+def child(request):
+    """
+    子sitemap, name为索引中列出的文件名, 如 sitemap-product-0.xml
+    """
+    return serve_file(request, request.GET.get('name', ''))
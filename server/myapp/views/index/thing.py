@@ -1,132 +1,176 @@
 # Create your views here.
+import logging
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
-from django.core.cache import cache
 
-from myapp import utils
+from myapp import utils, pagination, timing
+from myapp.cache import category_tree, counts, pageviews
+from myapp.cache.section import SectionCache
+from myapp.cache.tags import TAG_SITE_CONFIG, TAG_CATEGORY, TAG_THING
 from myapp.handler import APIResponse
-from myapp.models import Category, Thing, BasicTdk, BasicBanner, BasicSite
-from myapp.serializers import ThingSerializer, CategorySerializer, ListThingSerializer, NormalCategorySerializer, \
-    BasicSiteSerializer
+from myapp.models import Thing, BasicTdk, BasicBanner, BasicSite
+from myapp.querybudget import query_budget
+from myapp.search import index as search_index
+from myapp.serializers import ThingSerializer, ListThingSerializer, BasicSiteSerializer
+
+logger = logging.getLogger('myapp')
+
+# 页面数据依赖的模型
+CACHE_TAGS = (TAG_SITE_CONFIG, TAG_CATEGORY, TAG_THING)
+
+# 页面读取的参数及默认值, 缓存键只由这些参数组成
+SECTION_PARAMS = {'page': '1', 'pageSize': '9', 'categoryId': '-1', 'searchQuery': '', **pagination.SECTION_PARAMS}
+DETAIL_PARAMS = {'id': ''}
+
+# 详情页相关产品数
+RELATED_COUNT = 4
 
 
 def get_all_category_ids(category_id):
-    ids = [category_id]
-    sub_ids = Category.objects.filter(pid=category_id).values_list('id', flat=True)
-    for sub_id in sub_ids:
-        ids.extend(get_all_category_ids(sub_id))
-    return ids
+    return category_tree.get_tree().subtree_ids(category_id)
 
 
-class MyPageNumberPagination(PageNumberPagination):
+def section_queryset(category_ids=None):
+    """上架产品列表查询集, check_query_plans也用它检查执行计划"""
+    things = Thing.objects.filter(status=0)
+    if category_ids is not None:
+        things = things.filter(category_id__in=category_ids)
+    return things.order_by('-create_time')
+
+
+class MyPageNumberPagination(pagination.CountedPageNumberPagination):
     page_size = 9  # 每页的默认项
     page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
     max_page_size = 100  # 最大页尺寸
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def section(request):
-    if request.method == 'GET':
-        print(f"Received request: {request.GET}")
-
-        sectionData = {}
-
-        # seo数据
-        basicTdk = BasicTdk.get_solo()
-        sectionData['seoData'] = {
-            'seo_title': basicTdk.tdk_product_title,
-            'seo_description': basicTdk.tdk_product_description,
-            'seo_keywords': basicTdk.tdk_product_keywords,
-        }
-
-        # siteName
-        basicSite = BasicSite.get_solo()
-        basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
-        sectionData['siteName'] = basicSiteSerializer.data['site_name']
-
-        # banner数据
-        basicBanner = BasicBanner.get_solo()
-        sectionData['bannerData'] = basicBanner.banner_product
-
-        # 左侧分类数据
-        categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
-        categorySerializer = CategorySerializer(categories, many=True)
-        sectionData['categoryData'] = categorySerializer.data
-        # sectionData['categoryData'].insert(0, {
-        #     "id": -1,
-        #     "title": "All Products",
-        # })
-
-        # 左侧产品
-        featuredThings = Thing.objects.filter(status=0, dimension__icontains="Feature").order_by('-create_time')[:4]
-        thingSerializer = ListThingSerializer(featuredThings, many=True)
-        sectionData['featuredData'] = thingSerializer.data
-
-        # 产品数据
-        searchQuery = request.GET.get("searchQuery", None)
-        categoryId = request.GET.get("categoryId", None)
-        print(f"Received parameters: categoryId={categoryId}, searchQuery={searchQuery}")
-        
-        if searchQuery:
-            things = Thing.objects.filter(status=0, title__contains=searchQuery).order_by('-create_time')
-            print(f"Search query found {things.count()} products")
-        elif categoryId and categoryId != '-1':
+def build_section(request):
+    """
+    生成页面数据
+    """
+    sectionData = {}
+
+    # seo数据
+    basicTdk = BasicTdk.get_solo()
+    sectionData['seoData'] = {
+        'seo_title': basicTdk.tdk_product_title,
+        'seo_description': basicTdk.tdk_product_description,
+        'seo_keywords': basicTdk.tdk_product_keywords,
+    }
+
+    # siteName
+    basicSite = BasicSite.get_solo()
+    basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
+    sectionData['siteName'] = basicSiteSerializer.data['site_name']
+
+    # banner数据
+    basicBanner = BasicBanner.get_solo()
+    sectionData['bannerData'] = basicBanner.banner_product
+
+    # 左侧分类数据
+    sectionData['categoryData'] = category_tree.get_tree().serialize()
+    # sectionData['categoryData'].insert(0, {
+    #     "id": -1,
+    #     "title": "All Products",
+    # })
+
+    # 左侧产品
+    featuredThings = Thing.flagged(Thing.FLAG_FEATURED, 4)
+    thingSerializer = ListThingSerializer(featuredThings, many=True)
+    sectionData['featuredData'] = thingSerializer.data
+
+    # 产品数据
+    searchQuery = request.GET.get("searchQuery", None)
+    categoryId = request.GET.get("categoryId", None)
+    if searchQuery:
+        # 只在上架产品中检索, 总数为全部命中数
+        things = search_index.results(Thing.objects.filter(status=0).select_related('category'), searchQuery)
+        total = things.count()
+    else:
+        if categoryId and categoryId != '-1':
             try:
                 # 分类以及子分类的数据
                 category_ids = get_all_category_ids(int(categoryId))
-                print(f"Category IDs to search: {category_ids}")
-                things = Thing.objects.filter(category_id__in=category_ids, status=0).order_by('-create_time')
-                print(f"Category filter found {things.count()} products")
-            except Exception as e:
-                print(f"Error processing category: {e}")
-                things = Thing.objects.filter(status=0).order_by('-create_time')
+                things = section_queryset(category_ids)
+            except ValueError:
+                # 分类参数无效时返回全部产品
+                logger.warning(f"无效的分类参数: categoryId={categoryId}")
+                things = section_queryset()
         else:
-            things = Thing.objects.filter(status=0).order_by('-create_time')
-            print(f"No category specified, found {things.count()} products")
+            things = section_queryset()
+        total = counts.cached_count(things, (TAG_THING,))
+        things = things.select_related('category')
 
-        # 分页
+    # 分页, 搜索结果按相关度排序, 不使用游标分页
+    if pagination.cursor_requested(request) and not searchQuery:
+        paginator = pagination.KeysetPagination(MyPageNumberPagination.page_size)
+        paginated_things = paginator.paginate_queryset(things, request)
+        sectionData.update(paginator.get_links())
+    else:
         paginator = MyPageNumberPagination()
+        paginator.total = total
         paginated_things = paginator.paginate_queryset(things, request)
-        total = things.count()
 
-        serializer = ListThingSerializer(paginated_things, many=True)
+    serializer = ListThingSerializer(paginated_things, many=True)
 
+    with timing.phase(request, 'serialization'):
         sectionData['productData'] = serializer.data
-        sectionData['total'] = total
-        print(f"Returning {len(serializer.data)} products, total: {total}")
+    sectionData['total'] = total
 
-        return APIResponse(code=0, msg='查询成功', data=sectionData)
+    return sectionData
 
 
+@query_budget(12)
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def detail(request):
+def section(request):
+    if request.method == 'GET':
+        cache_key = SectionCache.make_key('thing', request, SECTION_PARAMS)
+        return SectionCache.respond(request, 'thing', cache_key, lambda: build_section(request), CACHE_TAGS, 3600)
+
+
+def build_detail(pk):
+    """
+    生成详情数据, 对象不存在时抛出Thing.DoesNotExist
+    """
     data = {}
-    try:
-        pk = request.GET.get('id', -1)
-        thing = Thing.objects.get(pk=pk)
-    except Thing.DoesNotExist:
-        utils.log_error(request, '对象不存在')
-        return APIResponse(code=1, msg='对象不存在')
+    thing = Thing.objects.select_related('category').get(pk=pk)
+    serializer = ThingSerializer(thing)
 
-    if request.method == 'GET':
-        serializer = ThingSerializer(thing)
+    # siteName
+    basicSite = BasicSite.get_solo()
+    basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
+    data['siteName'] = basicSiteSerializer.data['site_name']
 
-        # siteName
-        basicSite = BasicSite.get_solo()
-        basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
-        data['siteName'] = basicSiteSerializer.data['site_name']
+    # 详情数据
+    data['detailData'] = serializer.data
 
-        # 详情数据
-        data['detailData'] = serializer.data
+    # 相关产品, 未计算过时取同分类最新的产品
+    relatedThings = list(Thing.objects.filter(related_to__thing_id=thing.pk, status=0)
+                         .select_related('category').order_by('related_to__rank')[:RELATED_COUNT])
+    if not relatedThings and thing.category_id is not None:
+        relatedThings = Thing.objects.filter(category_id=thing.category_id, status=0).exclude(pk=thing.pk) \
+            .select_related('category').order_by('-create_time')[:RELATED_COUNT]
+    thingSerializer = ListThingSerializer(relatedThings, many=True)
+    data['relatedData'] = thingSerializer.data
 
-        # 相关产品
-        category = Category.objects.get(pk=serializer.data['category'])
-        relatedThings = category.category_thing.filter(status=0)[:4]
-        thingSerializer = ListThingSerializer(relatedThings, many=True)
-        data['relatedData'] = thingSerializer.data
+    return data
 
-        return APIResponse(code=0, msg='查询成功', data=data)
+
+@query_budget(6, sample=lambda: {'id': Thing.objects.filter(status=0).values_list('id', flat=True).first()})
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def detail(request):
+    if request.method == 'GET':
+        pk = request.GET.get('id', -1)
+        cache_key = SectionCache.make_key('thing_detail', request, DETAIL_PARAMS)
+        try:
+            response = SectionCache.respond(request, 'thing_detail', cache_key, lambda: build_detail(pk), CACHE_TAGS, 3600)
+        except Thing.DoesNotExist:
+            utils.log_error(request, '对象不存在')
+            return APIResponse(code=1, msg='对象不存在')
+
+        # 浏览量先在进程内累加, 定时批量写入
+        pageviews.hit(Thing, pk)
+        return response
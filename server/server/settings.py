@@ -298,12 +298,65 @@ CORS_ALLOW_METHODS = [
 ]
 
 # 缓存配置
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# 默认使用本机多进程共享的SQLite缓存(验证码/2FA/限流计数/页面缓存对所有worker可见)
+# 设置CACHE_URL可切换到外部缓存服务, 如 redis://127.0.0.1:6379/1
+if env('CACHE_URL', default=''):
+    CACHES = {
+        'default': env.cache('CACHE_URL')
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'myapp.cache.backends.SQLiteSharedCache',
+            'LOCATION': env('CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache', 'shared_cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,  # 条目上限
+                'CULL_FREQUENCY': 4,  # 超出上限时淘汰1/4
+                'L1_TIMEOUT': 1,  # 进程内L1缓存秒数
+                # 允许秒级延迟的键; 缓存标签版本号(cache_tag:)必须立即跨进程失效, 不能放进L1
+                'L1_PREFIXES': ['section_view:', 'nav_data'],
+            },
+        }
     }
+
+# 前台页面缓存各页面的条目上限, 未配置的页面使用SectionCache.BUDGETS中的默认值
+SECTION_CACHE_BUDGETS = {
+    'thing': 300,  # 分类 x 分页 x 搜索词
+    'thing_detail': 1000,
+    'news': 50,
+    'news_detail': 500,
+    'case': 50,
+    'case_detail': 300,
 }
 
+# 后台写入使缓存失效后, 自动预热依赖这些数据的前台接口
+CACHE_WARM_AFTER_INVALIDATE = env.bool('CACHE_WARM_AFTER_INVALIDATE', default=False)
+CACHE_WARM_DELAY = 2  # 失效后延迟预热的秒数, 期间的连续写入合并为一次预热
+CACHE_WARM_PAGES = 3  # 预热产品列表每个分类的前N页
+CACHE_WARM_WORKERS = 4  # 预热线程数
+
+# 列表总数的估算阈值: 不带过滤条件且表统计行数不小于该值时返回估算总数, 不再扫描整表; None为始终精确统计
+COUNT_ESTIMATE_THRESHOLD = env.int('COUNT_ESTIMATE_THRESHOLD', default=None)
+
+# 详情页浏览量在进程内累加后批量写入数据库的间隔秒数
+PV_FLUSH_INTERVAL = 30
+
+# 访问日志异步批量写入: 队列上限(满时丢弃), 每批条数, 最长攒批毫秒数
+OPLOG_BUFFER_SIZE = 10000
+OPLOG_BATCH_SIZE = 200
+OPLOG_FLUSH_INTERVAL_MS = 1000
+
+# 后台概览计数与数据库对账的间隔秒数
+DASHBOARD_RECONCILE_INTERVAL = 3600
+
+# 日志表保留月数(含当月), 由rotate_logs命令删除过期月份; 归档目录为空时不归档
+LOG_RETENTION_MONTHS = {
+    'myapp.OpLog': 6,
+    'myapp.ErrorLog': 12,
+    'myapp.SecurityEvent': 24,
+}
+LOG_ARCHIVE_DIR = env('LOG_ARCHIVE_DIR', default=None)
+
 
 # django上传文件限制 (内存阈值)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -325,6 +378,10 @@ SENDER_PASS = env('SENDER_PASS')
 # BASE_HOST_URL = 'http://127.0.0.1:8000'
 BASE_HOST_URL = 'http://mytest.com'
 
+# sitemap文件目录及每个子sitemap的最大URL数(协议上限50000)
+SITEMAP_ROOT = env('SITEMAP_ROOT', default=os.path.join(BASE_DIR, 'cache', 'sitemap'))
+SITEMAP_MAX_URLS = 50000
+
 # 安全团队配置
 SECURITY_TEAM_EMAILS = env('SECURITY_TEAM_EMAILS', default=[])  # 安全团队邮箱列表
 
@@ -378,8 +435,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'myapp.auth.MyRateThrottle.AnonCounterRateThrottle',
+        'myapp.auth.MyRateThrottle.UserCounterRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',